@@ -1,13 +1,36 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status, UploadFile, File
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
+from app.core.config import settings
 from app.core.security import get_current_active_user
+from app.core.rate_limit import limit_ai_requests, rate_limiter
 from app.db.session import get_db
 from app.models.user import User
-from app.schemas.ai_agent import AgentConfig, AgentResponse, FAQQuery
-from app.services.vector_service import search_vector_database
-from app.services.graph_service import store_memory, retrieve_memory
+from app.models.ai_config import AIConfig
+from app.schemas.ai_agent import AgentConfig, AgentResponse, FAQQuery, FAQDelete
+from app.services.vector_service import search_vector_database, find_exact_faq, delete_faqs, embedding_batcher
+from app.services.graph_service import (
+    store_memory,
+    retrieve_memory,
+    export_memory,
+    encode_memory_cursor,
+    memory_writer,
+)
+from app.services.ai_service import faq_product_scope, chat_stages
+from app.services.embedding_cache import embedding_cache
+from app.services.faq_exact_index import faq_exact_index
+from app.services.response_cache import response_cache
+from app.services.config_cache import config_cache
+from app.services.singleflight import singleflight_stats
+from app.services.memory_cache import memory_cache
+from app.services.memory_compaction import memory_compactor
+from app.services.connection_manager import connection_manager
+from app.services.llm_client import llm_client
+from app.services.faq_ingest import FAQFileError, detect_format, ingest_faq_file
 
 router = APIRouter()
 
@@ -20,8 +43,25 @@ def configure_ai_agent(
     """
     Configure AI agent settings.
     """
-    # Implementation will be added
-    pass
+    ai_config = db.query(AIConfig).filter(AIConfig.user_id == current_user.id).first()
+    if not ai_config:
+        ai_config = AIConfig(user_id=current_user.id)
+        db.add(ai_config)
+    
+    prompt_changed = ai_config.custom_prompt != config.custom_prompt
+    
+    ai_config.is_active = config.is_active
+    ai_config.store_level = config.store_level
+    ai_config.faq_threshold = config.faq_threshold
+    ai_config.custom_prompt = config.custom_prompt
+    db.commit()
+    config_cache.invalidate_user(current_user.id)
+    
+    # Responses generated under the old prompt are no longer valid
+    if prompt_changed:
+        response_cache.invalidate(current_user.id)
+    
+    return {"success": True, "message": "AI agent configured successfully"}
 
 @router.get("/config", response_model=AgentConfig)
 def get_ai_config(
@@ -31,10 +71,18 @@ def get_ai_config(
     """
     Get current AI agent configuration.
     """
-    # Implementation will be added
-    pass
+    ai_config = db.query(AIConfig).filter(AIConfig.user_id == current_user.id).first()
+    if not ai_config:
+        return AgentConfig()
+    
+    return AgentConfig(
+        is_active=ai_config.is_active,
+        store_level=ai_config.store_level,
+        faq_threshold=ai_config.faq_threshold,
+        custom_prompt=ai_config.custom_prompt,
+    )
 
-@router.post("/faq", response_model=Dict[str, Any])
+@router.post("/faq", response_model=Dict[str, Any], dependencies=[Depends(limit_ai_requests)])
 async def query_faq(
     query: FAQQuery,
     current_user: User = Depends(get_current_active_user),
@@ -43,27 +91,141 @@ async def query_faq(
     """
     Query the FAQ system using vector search.
     """
-    # Search vector database for similar questions
-    results = await search_vector_database(query.question, threshold=0.75)
+    # Scope the search to the user's store, or to the product in product mode
+    ai_config = config_cache.get_ai_config(db, current_user.id)
+    product_id = (query.context or {}).get("product_id")
+    faq_product_id = faq_product_scope(ai_config, product_id) if ai_config else None
+    
+    # Answer exact repeats from the hash index, otherwise search for similar questions
+    exact_match = await find_exact_faq(query.question, owner_id=current_user.id, product_id=faq_product_id)
+    if exact_match:
+        results = [exact_match]
+    else:
+        results = await search_vector_database(
+            query.question,
+            threshold=0.75,
+            owner_id=current_user.id,
+            product_id=faq_product_id,
+        )
     
     # Store the interaction in graph database for long-term memory
     await store_memory(current_user.id, "faq_query", {"question": query.question, "results": results})
     
     return {"results": results}
 
+@router.post("/faq/import", response_model=Dict[str, Any])
+async def import_faqs(
+    file: UploadFile = File(...),
+    product_id: Optional[int] = None,
+    batch_size: Optional[int] = Query(None, ge=1, le=settings.FAQ_IMPORT_MAX_BATCH_SIZE),
+    concurrency: Optional[int] = Query(None, ge=1, le=settings.FAQ_IMPORT_MAX_CONCURRENCY),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Bulk import FAQs from a CSV (question,answer columns) or JSONL file
+    into the current user's store, or into one of its products.
+    """
+    try:
+        fmt = detect_format(file.filename)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        report = await ingest_faq_file(
+            file.file,
+            fmt,
+            owner_id=current_user.id,
+            product_id=product_id,
+            batch_size=batch_size,
+            concurrency=concurrency,
+        )
+    except FAQFileError as e:
+        raise HTTPException(status_code=400, detail={"error": str(e), "report": e.report})
+    return {"report": report}
+
+@router.delete("/faq", response_model=AgentResponse)
+async def delete_faq(
+    faqs: FAQDelete,
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Delete FAQs by question from the current user's store, or from one of its products.
+    """
+    if not await delete_faqs(faqs.questions, owner_id=current_user.id, product_id=faqs.product_id):
+        raise HTTPException(status_code=503, detail="FAQs could not be deleted")
+    return {"success": True, "message": f"Deleted {len(faqs.questions)} FAQs"}
+
 @router.get("/memory/{user_id}", response_model=Dict[str, Any])
 async def get_user_memory(
     user_id: int,
+    limit: int = 10,
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db),
 ):
     """
-    Retrieve user memory from graph database.
+    Retrieve user memory from graph database, newest first.
+    Pass next_cursor from the previous response as cursor to get the next page.
     """
     # Check permissions
     if current_user.id != user_id and not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Not enough permissions")
     
+    limit = max(1, min(limit, 100))
+    
     # Retrieve memory from graph database
-    memory = await retrieve_memory(user_id)
-    return {"memory": memory}
+    try:
+        memory = await retrieve_memory(user_id, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    next_cursor = encode_memory_cursor(memory[-1]) if len(memory) == limit else None
+    return {"memory": memory, "next_cursor": next_cursor}
+
+@router.get("/memory/{user_id}/export")
+async def export_user_memory(
+    user_id: int,
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Stream a user's full memory history as newline-delimited JSON, newest first.
+    """
+    # Check permissions
+    if current_user.id != user_id and not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    
+    async def lines():
+        async for memory in export_memory(user_id):
+            yield json.dumps(memory, default=str) + "\n"
+    
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="memory-{user_id}.ndjson"'},
+    )
+
+@router.get("/stats", response_model=Dict[str, Any])
+def get_ai_stats(
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Get AI pipeline cache statistics.
+    """
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    
+    return {
+        "embedding_cache": embedding_cache.stats(),
+        "embedding_batcher": embedding_batcher.stats(),
+        "faq_exact_index": faq_exact_index.stats(),
+        "response_cache": response_cache.stats(),
+        "config_cache": config_cache.stats(),
+        "singleflight": singleflight_stats(),
+        "chat_stages": chat_stages.stats(),
+        "rate_limit": rate_limiter.stats(),
+        "llm": llm_client.stats(),
+        "memory_writer": memory_writer.stats(),
+        "memory_cache": memory_cache.stats(),
+        "memory_compaction": memory_compactor.stats(),
+        "websockets": connection_manager.stats(),
+    }
@@ -1,42 +1,122 @@
-from fastapi import APIRouter, Depends, HTTPException, status, WebSocket, WebSocketDisconnect
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response, WebSocket
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
-from app.core.security import get_current_active_user
-from app.db.session import get_db
+from app.core.security import get_current_active_user, user_from_token
+from app.core.rate_limit import limit_ai_requests, rate_limiter, retry_after_header
+from app.db.session import get_db, session_scope
 from app.models.user import User
 from app.schemas.chat import ChatMessage, ChatResponse
-from app.services.ai_service import process_chat_message
+from app.services.ai_service import process_chat_message, stream_chat_message
+from app.services.connection_manager import ChatConnection, connection_manager
+from app.services.stage_timing import server_timing
 
 router = APIRouter()
 
-@router.post("/send", response_model=ChatResponse)
+@router.post("/send", response_model=ChatResponse, dependencies=[Depends(limit_ai_requests)])
 async def send_message(
     message: ChatMessage,
+    response: Response,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db),
 ):
     """
     Send a chat message and get AI response.
+    The Server-Timing header reports how long each pipeline stage took.
     """
     # Process the message with AI
-    response = await process_chat_message(message.content, current_user.id, db)
-    return {"message": response}
+    product_id = (message.metadata or {}).get("product_id")
+    timings = {}
+    reply = await process_chat_message(message.content, current_user.id, db, product_id=product_id, timings=timings)
+    response.headers["Server-Timing"] = server_timing(timings)
+    return {"message": reply}
+
+@router.post("/stream", dependencies=[Depends(limit_ai_requests)])
+async def stream_message(
+    message: ChatMessage,
+    request: Request,
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Send a chat message and stream the AI response as Server-Sent Events.
+    Emits "partial" events with response chunks, then one "final" event with the whole message.
+    """
+    product_id = (message.metadata or {}).get("product_id")
+    user_id = current_user.id
+    
+    async def events():
+        chunks = []
+        async for chunk in stream_chat_message(message.content, user_id, product_id=product_id):
+            if await request.is_disconnected():
+                # Stop generating for a client that went away
+                return
+            chunks.append(chunk)
+            yield f"event: partial\ndata: {json.dumps({'content': chunk})}\n\n"
+        yield f"event: final\ndata: {json.dumps({'message': ''.join(chunks)})}\n\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 # WebSocket connection for real-time chat
 @router.websocket("/ws/{user_id}")
 async def websocket_endpoint(
     websocket: WebSocket,
     user_id: int,
-    db: Session = Depends(get_db),
+    stream: bool = False,
+    token: Optional[str] = None,
 ):
-    await websocket.accept()
-    try:
-        while True:
-            data = await websocket.receive_text()
-            # Process the message with AI
-            response = await process_chat_message(data, user_id, db)
-            await websocket.send_text(response)
-    except WebSocketDisconnect:
-        # Handle disconnect
-        pass
+    """
+    Replies are plain text, or with ?stream=true JSON frames:
+    {"type": "partial", "content": chunk} for each chunk, then {"type": "final", "content": message}.
+    Server-initiated messages for user_id are only sent to sockets opened with
+    ?token= set to an access token of that user.
+    """
+    if token is not None:
+        # Checked before accepting, so a socket with a foreign token is never subscribed
+        with session_scope() as db:
+            user = user_from_token(db, token)
+            authorized = user is not None and user.id == user_id
+        if not authorized:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+            return
+    
+    connection = await connection_manager.connect(websocket, user_id, subscribe=token is not None)
+    if connection is None:
+        return
+    
+    # Chat sockets are anonymous, so each client address gets its own rate limit
+    caller = f"ip:{websocket.client.host}" if websocket.client else f"socket:{id(websocket)}"
+    
+    async def handle(connection: ChatConnection, data: str) -> None:
+        wait = await rate_limiter.admit(caller, user_id)
+        if wait:
+            retry_after = retry_after_header(wait)
+            notice = f"Too many messages. Please retry in {retry_after} seconds."
+            if stream:
+                notice = json.dumps({"type": "error", "content": notice, "retry_after": int(retry_after)})
+            connection.send(notice)
+            return
+        
+        try:
+            # Process the message with AI; the configuration is read in a short session of its own,
+            # so neither idle sockets nor replies being generated hold pooled database connections
+            if not stream:
+                connection.send(await process_chat_message(data, user_id))
+                return
+            
+            chunks = []
+            async for chunk in stream_chat_message(data, user_id):
+                chunks.append(chunk)
+                if not connection.send(json.dumps({"type": "partial", "content": chunk})):
+                    return
+            connection.send(json.dumps({"type": "final", "content": "".join(chunks)}))
+        finally:
+            rate_limiter.release()
+    
+    await connection_manager.serve(connection, handle)
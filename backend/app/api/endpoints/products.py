@@ -4,8 +4,10 @@ from typing import List
 
 from app.core.security import get_current_active_user
 from app.db.session import get_db
+from app.models.product import Product
 from app.models.user import User
 from app.schemas.product import ProductCreate, ProductResponse, ProductUpdate
+from app.services.config_cache import config_cache
 
 router = APIRouter()
 
@@ -54,8 +56,21 @@ def update_product(
     """
     Update a product.
     """
-    # Implementation will be added
-    pass
+    product = db.query(Product).filter(Product.id == product_id).first()
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
+    if product.owner_id != current_user.id and not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    
+    for field, value in product_in.dict(exclude_unset=True).items():
+        setattr(product, field, value)
+    db.commit()
+    db.refresh(product)
+    
+    # Chat checks read ai_enabled through the configuration cache
+    config_cache.invalidate_product(product.id)
+    
+    return product
 
 @router.delete("/{product_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_product(
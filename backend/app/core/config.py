@@ -39,7 +39,43 @@ class Settings(BaseSettings):
             path=f"/{values.get('POSTGRES_DB') or ''}",
         )
     
-    # Vector Database (Pinecone)
+    # Vector Database
+    VECTOR_BACKEND: str = os.getenv("VECTOR_BACKEND", "pinecone")
+    VECTOR_RETRY_INTERVAL: float = float(os.getenv("VECTOR_RETRY_INTERVAL", "30"))  # Seconds between reconnects while down
+    EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL", "text-embedding-ada-002")
+    EMBEDDING_DIMENSION: int = int(os.getenv("EMBEDDING_DIMENSION", "1536"))  # OpenAI embeddings dimension
+    EMBEDDING_CACHE_SIZE: int = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+    EMBEDDING_CACHE_PATH: str = os.getenv("EMBEDDING_CACHE_PATH", "")  # Empty disables the on-disk tier
+    EMBEDDING_BATCH_SIZE: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))  # Texts per embedding call
+    EMBEDDING_BATCH_WAIT_MS: float = float(os.getenv("EMBEDDING_BATCH_WAIT_MS", "5"))  # Longest a text waits for its batch to fill
+    EMBEDDING_BATCH_CONCURRENCY: int = int(os.getenv("EMBEDDING_BATCH_CONCURRENCY", "4"))  # Embedding calls in flight
+    
+    # Bulk FAQ import
+    FAQ_EXACT_TTL: float = float(os.getenv("FAQ_EXACT_TTL", "300"))  # Seconds before a namespace of the exact-match index is read again
+    FAQ_EXACT_MAX_NAMESPACES: int = int(os.getenv("FAQ_EXACT_MAX_NAMESPACES", "1024"))  # Least recently used namespaces beyond this are dropped
+    FAQ_IMPORT_BATCH_SIZE: int = int(os.getenv("FAQ_IMPORT_BATCH_SIZE", "100"))
+    FAQ_IMPORT_CONCURRENCY: int = int(os.getenv("FAQ_IMPORT_CONCURRENCY", "4"))
+    FAQ_IMPORT_MAX_BATCH_SIZE: int = int(os.getenv("FAQ_IMPORT_MAX_BATCH_SIZE", "1000"))  # Upper bound for the batch_size parameter
+    FAQ_IMPORT_MAX_CONCURRENCY: int = int(os.getenv("FAQ_IMPORT_MAX_CONCURRENCY", "16"))  # Upper bound for the concurrency parameter
+    
+    # Semantic response cache
+    RESPONSE_CACHE_SIZE: int = int(os.getenv("RESPONSE_CACHE_SIZE", "256"))  # Entries per store
+    RESPONSE_CACHE_MAX_STORES: int = int(os.getenv("RESPONSE_CACHE_MAX_STORES", "1024"))
+    RESPONSE_CACHE_TTL: float = float(os.getenv("RESPONSE_CACHE_TTL", "300"))  # Seconds
+    RESPONSE_CACHE_THRESHOLD: float = float(os.getenv("RESPONSE_CACHE_THRESHOLD", "0.95"))
+    CONFIG_CACHE_TTL: float = float(os.getenv("CONFIG_CACHE_TTL", "30"))  # Seconds AI configuration is reused
+    CONFIG_CACHE_SIZE: int = int(os.getenv("CONFIG_CACHE_SIZE", "10000"))
+    
+    # Local vector store (VECTOR_BACKEND=local)
+    LOCAL_VECTOR_PATH: str = os.getenv("LOCAL_VECTOR_PATH", "data/faq_index")
+    LOCAL_VECTOR_MAX_OPEN: int = int(os.getenv("LOCAL_VECTOR_MAX_OPEN", "256"))  # Namespace indexes kept open
+    LOCAL_VECTOR_QUANTIZATION: str = os.getenv("LOCAL_VECTOR_QUANTIZATION", "none")  # none, float16 or int8
+    LOCAL_VECTOR_RERANK_FACTOR: int = int(os.getenv("LOCAL_VECTOR_RERANK_FACTOR", "4"))  # 0 disables exact re-rank
+    LOCAL_VECTOR_ANN: str = os.getenv("LOCAL_VECTOR_ANN", "none")  # none or ivf
+    LOCAL_VECTOR_IVF_NLIST: int = int(os.getenv("LOCAL_VECTOR_IVF_NLIST", "256"))
+    LOCAL_VECTOR_IVF_NPROBE: int = int(os.getenv("LOCAL_VECTOR_IVF_NPROBE", "8"))  # Lists scanned per query
+    
+    # Pinecone
     PINECONE_API_KEY: str = os.getenv("PINECONE_API_KEY", "")
     PINECONE_ENVIRONMENT: str = os.getenv("PINECONE_ENVIRONMENT", "")
     PINECONE_INDEX_NAME: str = os.getenv("PINECONE_INDEX_NAME", "auto-faq")
@@ -48,9 +84,58 @@ class Settings(BaseSettings):
     NEO4J_URI: str = os.getenv("NEO4J_URI", "bolt://localhost:7687")
     NEO4J_USERNAME: str = os.getenv("NEO4J_USERNAME", "neo4j")
     NEO4J_PASSWORD: str = os.getenv("NEO4J_PASSWORD", "password")
+    NEO4J_MAX_POOL_SIZE: int = int(os.getenv("NEO4J_MAX_POOL_SIZE", "50"))
+    NEO4J_MAX_CONCURRENCY: int = int(os.getenv("NEO4J_MAX_CONCURRENCY", "20"))  # Concurrent queries per worker
+    NEO4J_CONNECTION_TIMEOUT: float = float(os.getenv("NEO4J_CONNECTION_TIMEOUT", "5"))  # Seconds
+    NEO4J_RETRY_INTERVAL: float = float(os.getenv("NEO4J_RETRY_INTERVAL", "30"))  # Seconds between reconnects while down
+    NEO4J_INIT_SCHEMA: bool = os.getenv("NEO4J_INIT_SCHEMA", "true").lower() in ("1", "true", "yes")  # Create constraints and indexes at startup
+    MEMORY_BACKEND: str = os.getenv("MEMORY_BACKEND", "neo4j")  # neo4j or sqlite
+    MEMORY_SQLITE_PATH: str = os.getenv("MEMORY_SQLITE_PATH", "data/memories.db")
+    MEMORY_QUEUE_SIZE: int = int(os.getenv("MEMORY_QUEUE_SIZE", "10000"))  # Memory events waiting to be written
+    MEMORY_BATCH_SIZE: int = int(os.getenv("MEMORY_BATCH_SIZE", "200"))
+    MEMORY_FLUSH_INTERVAL: float = float(os.getenv("MEMORY_FLUSH_INTERVAL", "0.5"))  # Seconds
+    MEMORY_OVERFLOW_POLICY: str = os.getenv("MEMORY_OVERFLOW_POLICY", "drop_oldest")  # drop_oldest, drop_newest or block
+    MEMORY_WRITE_ATTEMPTS: int = int(os.getenv("MEMORY_WRITE_ATTEMPTS", "3"))  # Tries per batch while the backend is unreachable
+    MEMORY_CACHE_DEPTH: int = int(os.getenv("MEMORY_CACHE_DEPTH", "20"))  # Recent memories kept per user
+    MEMORY_CACHE_USERS: int = int(os.getenv("MEMORY_CACHE_USERS", "10000"))
+    MEMORY_CACHE_TTL: float = float(os.getenv("MEMORY_CACHE_TTL", "300"))  # Seconds
+    MEMORY_RETENTION_DAYS: float = float(os.getenv("MEMORY_RETENTION_DAYS", "90"))  # Older memories are rolled up into daily summaries
+    MEMORY_COMPACTION_BATCH_SIZE: int = int(os.getenv("MEMORY_COMPACTION_BATCH_SIZE", "500"))  # Memories per transaction
+    MEMORY_COMPACTION_INTERVAL: float = float(os.getenv("MEMORY_COMPACTION_INTERVAL", "3600"))  # Seconds; 0 disables the background job
+    
+    # Chat pipeline deadlines, in seconds
+    CHAT_FAQ_TIMEOUT: float = float(os.getenv("CHAT_FAQ_TIMEOUT", "1.0"))  # A slower FAQ search counts as no match
+    CHAT_LOOKUP_TIMEOUT: float = float(os.getenv("CHAT_LOOKUP_TIMEOUT", "1.0"))  # Response cache lookup
+    CHAT_GENERATION_TIMEOUT: float = float(os.getenv("CHAT_GENERATION_TIMEOUT", "30"))
+    CHAT_MEMORY_TIMEOUT: float = float(os.getenv("CHAT_MEMORY_TIMEOUT", "5"))  # Background memory writes
+    
+    # Rate limiting of chat and AI endpoints; a rate or cap of 0 disables it
+    RATE_LIMIT_BACKEND: str = os.getenv("RATE_LIMIT_BACKEND", "memory")  # memory (per worker) or redis
+    RATE_LIMIT_USER_RATE: float = float(os.getenv("RATE_LIMIT_USER_RATE", "1"))  # Requests per second per caller
+    RATE_LIMIT_USER_BURST: float = float(os.getenv("RATE_LIMIT_USER_BURST", "10"))
+    RATE_LIMIT_STORE_RATE: float = float(os.getenv("RATE_LIMIT_STORE_RATE", "20"))  # Requests per second per store
+    RATE_LIMIT_STORE_BURST: float = float(os.getenv("RATE_LIMIT_STORE_BURST", "100"))
+    AI_MAX_CONCURRENCY: int = int(os.getenv("AI_MAX_CONCURRENCY", "64"))  # AI requests in progress per worker
+    
+    # Chat WebSockets
+    WS_MAX_CONNECTIONS: int = int(os.getenv("WS_MAX_CONNECTIONS", "1000"))  # Per worker
+    WS_SEND_QUEUE_SIZE: int = int(os.getenv("WS_SEND_QUEUE_SIZE", "32"))  # Outgoing messages buffered per socket
+    WS_IDLE_TIMEOUT: float = float(os.getenv("WS_IDLE_TIMEOUT", "300"))  # Seconds without a message or ping
+    WS_PING_INTERVAL: float = float(os.getenv("WS_PING_INTERVAL", "20"))  # Seconds between protocol-level pings
+    PUBSUB_BACKEND: str = os.getenv("PUBSUB_BACKEND", "memory")  # memory (single process) or redis
+    REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
     
     # OpenAI
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
+    LLM_BASE_URL: str = os.getenv("LLM_BASE_URL", "")  # OpenAI-compatible API, e.g. https://api.openai.com/v1; empty uses a placeholder reply
+    LLM_API_KEY: str = os.getenv("LLM_API_KEY", OPENAI_API_KEY)
+    LLM_MODEL: str = os.getenv("LLM_MODEL", "gpt-4o-mini")
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))  # Requests in flight per worker
+    LLM_TIMEOUT: float = float(os.getenv("LLM_TIMEOUT", "30"))  # Seconds
+    LLM_CONNECT_TIMEOUT: float = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+    LLM_MAX_RETRIES: int = int(os.getenv("LLM_MAX_RETRIES", "2"))  # On timeouts, 429 and 5xx
+    LLM_RETRY_BASE_DELAY: float = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5"))  # Seconds, doubled per attempt with jitter
+    LLM_MAX_TOKENS: int = int(os.getenv("LLM_MAX_TOKENS", "512"))
     
     # Shopee Integration
     SHOPEE_API_URL: str = os.getenv("SHOPEE_API_URL", "")
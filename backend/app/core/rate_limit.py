@@ -0,0 +1,254 @@
+import math
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Callable, Dict, List, Sequence, Tuple
+
+from fastapi import Depends, HTTPException, status
+
+from app.core.config import settings
+from app.core.security import get_current_active_user
+from app.models.user import User
+
+
+class BucketStore:
+    """
+    Interface for where token bucket state lives.
+
+    take() refills each (key, rate, burst) bucket at rate tokens per second
+    up to burst, then removes cost tokens from every one of them if all have
+    enough, atomically. It returns one wait per bucket: all 0 when the tokens
+    were taken, otherwise the seconds until each bucket will have enough,
+    and nothing is taken from any of them.
+    """
+
+    async def take(self, buckets: Sequence[Tuple[str, float, float]], cost: float = 1.0) -> List[float]:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class InMemoryBucketStore(BucketStore):
+    """Buckets in this process only; each worker enforces the limits separately."""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def take(self, buckets: Sequence[Tuple[str, float, float]], cost: float = 1.0) -> List[float]:
+        now = time.monotonic()
+        levels = []
+        for key, rate, burst in buckets:
+            tokens, updated = self._buckets.get(key, (burst, now))
+            levels.append(min(burst, tokens + (now - updated) * rate))
+        waits = [max(0.0, (cost - tokens) / rate) for (_, rate, _), tokens in zip(buckets, levels)]
+        spend = cost if not any(waits) else 0.0
+        for (key, _, _), tokens in zip(buckets, levels):
+            self._buckets[key] = (tokens - spend, now)
+            self._buckets.move_to_end(key)
+        # A forgotten bucket would have refilled by now for all but the busiest keys
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return waits
+
+
+# Refill every bucket and take from all or none in one round trip; the server clock keeps workers consistent.
+# ARGV is the cost, then a rate and a burst per key.
+_TAKE_SCRIPT = """
+local cost = tonumber(ARGV[1])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local levels = {}
+local waits = {}
+local spend = cost
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[2 * i])
+    local burst = tonumber(ARGV[2 * i + 1])
+    local state = redis.call('HMGET', key, 'tokens', 'updated')
+    local tokens = tonumber(state[1]) or burst
+    local updated = tonumber(state[2]) or now
+    levels[i] = math.min(burst, tokens + math.max(0, now - updated) * rate)
+    waits[i] = 0
+    if levels[i] < cost then
+        waits[i] = (cost - levels[i]) / rate
+        spend = 0
+    end
+end
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[2 * i])
+    local burst = tonumber(ARGV[2 * i + 1])
+    redis.call('HSET', key, 'tokens', tostring(levels[i] - spend), 'updated', tostring(now))
+    redis.call('PEXPIRE', key, math.ceil(burst / rate * 1000) + 1000)
+    waits[i] = tostring(waits[i])
+end
+return waits
+"""
+
+
+class RedisBucketStore(BucketStore):
+    """Buckets shared by every worker and node using the same Redis server."""
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        self.url = url
+        self.prefix = prefix
+        self._redis = None
+        self._take = None
+
+    async def take(self, buckets: Sequence[Tuple[str, float, float]], cost: float = 1.0) -> List[float]:
+        if self._redis is None:
+            # Imported lazily so single-process deployments do not need a Redis client
+            import redis.asyncio as redis
+            self._redis = redis.from_url(self.url, decode_responses=True)
+            self._take = self._redis.register_script(_TAKE_SCRIPT)
+        args: List[float] = [cost]
+        for _, rate, burst in buckets:
+            args.extend((rate, burst))
+        waits = await self._take(keys=[self.prefix + key for key, _, _ in buckets], args=args)
+        return [float(wait) for wait in waits]
+
+    async def close(self) -> None:
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+
+# Registered bucket stores, keyed by the RATE_LIMIT_BACKEND setting
+_bucket_stores: Dict[str, Callable[[], BucketStore]] = {
+    "memory": InMemoryBucketStore,
+    "redis": lambda: RedisBucketStore(settings.REDIS_URL),
+}
+
+def register_bucket_store(name: str, factory: Callable[[], BucketStore]) -> None:
+    """Register a bucket store so it can be selected with RATE_LIMIT_BACKEND."""
+    _bucket_stores[name] = factory
+
+def create_bucket_store(name: str) -> BucketStore:
+    if name not in _bucket_stores:
+        raise ValueError(f"Unknown rate limit backend: {name}")
+    return _bucket_stores[name]()
+
+
+class RateLimiter:
+    """
+    Admission control for AI work.
+
+    A request is admitted if a slot is free under the per-worker cap of
+    max_concurrency requests in progress, its caller's bucket has a token and
+    the bucket of the store whose AI answers has one. Rejections are
+    immediate and say how long to wait. A rate or cap of 0 disables that
+    check. If the bucket store is unreachable, requests are admitted.
+    """
+
+    def __init__(
+        self,
+        store: BucketStore,
+        user_rate: float = 1.0,
+        user_burst: float = 10.0,
+        store_rate: float = 20.0,
+        store_burst: float = 100.0,
+        max_concurrency: int = 64,
+    ):
+        self.store = store
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.store_rate = store_rate
+        self.store_burst = store_burst
+        self.max_concurrency = max_concurrency
+        self.active = 0
+        self.admitted = 0
+        self.rejected = {"user": 0, "store": 0, "concurrency": 0}
+        self.errors = 0
+
+    async def _take(self, buckets: List[Tuple[str, float, float]]) -> List[float]:
+        if not buckets:
+            return []
+        try:
+            return await self.store.take(buckets)
+        except Exception as e:
+            self.errors += 1
+            print(f"Error checking rate limits for {', '.join(key for key, _, _ in buckets)}: {e}")
+            return [0.0] * len(buckets)
+
+    async def admit(self, caller: str, store_id: int) -> float:
+        """
+        Admit a request from caller, a key such as "user:42", to a store's AI.
+        Returns 0 if admitted, in which case release() must be called when the
+        work is done, or the seconds the caller should wait before retrying.
+        A token is taken from the caller's and the store's buckets together,
+        so a request refused by one costs nothing from the other.
+        """
+        if self.max_concurrency > 0 and self.active >= self.max_concurrency:
+            self.rejected["concurrency"] += 1
+            return 1.0
+        # Hold the slot while checking buckets so concurrent requests cannot overshoot the cap
+        self.active += 1
+
+        buckets = [
+            (caller, self.user_rate, self.user_burst, "user"),
+            (f"store:{store_id}", self.store_rate, self.store_burst, "store"),
+        ]
+        # A rate of 0 disables that bucket
+        buckets = [bucket for bucket in buckets if bucket[1] > 0]
+        try:
+            waits = await self._take([(key, rate, burst) for key, rate, burst, _ in buckets])
+        except BaseException:
+            # Cancelled mid-check, e.g. by a WebSocket disconnect; release() will not be called
+            self.active -= 1
+            raise
+        wait = max(waits, default=0.0)
+        if wait:
+            # Count the rejection against the bucket that made the caller wait longest
+            self.rejected[buckets[waits.index(wait)][3]] += 1
+            self.active -= 1
+            return wait
+        self.admitted += 1
+        return 0.0
+
+    def release(self) -> None:
+        self.active -= 1
+
+    async def close(self) -> None:
+        await self.store.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "store": type(self.store).__name__,
+            "active": self.active,
+            "max_concurrency": self.max_concurrency,
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+            "errors": self.errors,
+        }
+
+
+def retry_after_header(wait: float) -> str:
+    """Whole seconds for a Retry-After header, never 0."""
+    return str(max(1, math.ceil(wait)))
+
+async def limit_ai_requests(current_user: User = Depends(get_current_active_user)) -> AsyncIterator[None]:
+    """
+    Dependency admitting an AI request from the current user to their own
+    store, or rejecting it with 429 and Retry-After.
+    """
+    wait = await rate_limiter.admit(f"user:{current_user.id}", current_user.id)
+    if wait:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests",
+            headers={"Retry-After": retry_after_header(wait)},
+        )
+    try:
+        yield
+    finally:
+        rate_limiter.release()
+
+
+# Initialize rate limiter
+rate_limiter = RateLimiter(
+    create_bucket_store(settings.RATE_LIMIT_BACKEND),
+    user_rate=settings.RATE_LIMIT_USER_RATE,
+    user_burst=settings.RATE_LIMIT_USER_BURST,
+    store_rate=settings.RATE_LIMIT_STORE_RATE,
+    store_burst=settings.RATE_LIMIT_STORE_BURST,
+    max_concurrency=settings.AI_MAX_CONCURRENCY,
+)
@@ -1,6 +1,13 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.services.vector_service import startup_vector_store, shutdown_vector_store
+from app.services.graph_service import startup_graph, shutdown_graph
+from app.services.memory_compaction import memory_compactor
+from app.services.connection_manager import startup_chat, shutdown_chat
+from app.core.rate_limit import rate_limiter
+from app.services.llm_client import llm_client
+
 app = FastAPI(
     title="AUTO - Digital Marketplace with AI",
     description="Automated marketplace for digital products with AI integration",
@@ -32,10 +39,34 @@ app.include_router(orders.router, prefix="/api/orders", tags=["orders"])
 app.include_router(chat.router, prefix="/api/chat", tags=["chat"])
 app.include_router(ai_agent.router, prefix="/api/ai", tags=["ai"])
 
+@app.on_event("startup")
+async def startup():
+    await startup_vector_store()
+    await startup_graph()
+    memory_compactor.start()
+    await startup_chat()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await shutdown_chat()
+    await rate_limiter.close()
+    await llm_client.close()
+    await shutdown_vector_store()
+    await memory_compactor.stop()
+    await shutdown_graph()
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to AUTO - Digital Marketplace with AI"}
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
+    from app.core.config import settings
+    uvicorn.run(
+        "app.main:app",
+        host="0.0.0.0",
+        port=8000,
+        reload=True,
+        ws_ping_interval=settings.WS_PING_INTERVAL,
+        ws_ping_timeout=settings.WS_PING_INTERVAL,
+    )
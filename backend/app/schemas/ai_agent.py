@@ -21,6 +21,11 @@ class FAQQuery(BaseModel):
     question: str
     context: Optional[Dict[str, Any]] = None
 
+# FAQ Deletion
+class FAQDelete(BaseModel):
+    questions: List[str]
+    product_id: Optional[int] = None
+
 # Chat Message
 class ChatMessage(BaseModel):
     content: str
@@ -1,56 +1,353 @@
 import os
 import json
-from typing import Dict, List, Any, Optional
+import time
+import asyncio
+from typing import Dict, List, Any, AsyncIterator, Callable, Optional, Set, Tuple
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
+from app.db.session import session_scope
 from app.models.user import User
-from app.models.ai_config import AIConfig, StoreLevel
-from app.services.vector_service import search_vector_database
+from app.models.ai_config import StoreLevel
+from app.schemas.ai_agent import AgentConfig
+from app.services.vector_service import search_vector_database, find_exact_faq, get_embeddings
+from app.services.response_cache import response_cache, prompt_version
+from app.services.embedding_cache import normalize_text
+from app.services.singleflight import SingleFlight
+from app.services.config_cache import config_cache
+from app.services.stage_timing import StageTimer
+from app.services.llm_client import llm_client
 from app.services.graph_service import store_memory, retrieve_memory
 
-async def process_chat_message(message: str, user_id: int, db: Session) -> str:
+# Identical concurrent questions to the same store share one generated response
+chat_flight = SingleFlight("chat_generation")
+
+# Durations and outcomes of every chat pipeline stage, for the stats endpoint
+chat_stages = StageTimer()
+
+# Sent instead of a generated response that missed its deadline
+GENERATION_FALLBACK = "Sorry, I'm taking longer than usual to answer. Please try again in a moment."
+
+# Memory writes running off the response path, referenced so they are not garbage collected
+_background_writes: Set["asyncio.Task[Any]"] = set()
+
+def faq_product_scope(ai_config: AgentConfig, product_id: Optional[int]) -> Optional[int]:
+    """
+    Product whose FAQ partition should be searched, or None for the store-wide partition.
+    """
+    if ai_config.store_level == StoreLevel.PRODUCT:
+        return product_id
+    return None
+
+def remember(user_id: int, interaction_type: str, data: Dict[str, Any]) -> None:
+    """
+    Store an interaction in memory without making the response wait for it.
+    """
+    task = asyncio.ensure_future(chat_stages.run(
+        "memory",
+        store_memory(user_id=user_id, interaction_type=interaction_type, data=data),
+        settings.CHAT_MEMORY_TIMEOUT,
+        default=False,
+    ))
+    _background_writes.add(task)
+    task.add_done_callback(_background_writes.discard)
+
+async def search_faq(
+    message: str,
+    user_id: int,
+    ai_config: AgentConfig,
+    product_id: Optional[int] = None,
+    on_exact_miss: Optional[Callable[[], None]] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Best FAQ match for the message if it clears the store's threshold.
+    on_exact_miss is called once the exact lookup has missed, before the vector search.
+    """
+    # Only this store's FAQs (or the product's, in product mode) are searched
+    faq_product_id = faq_product_scope(ai_config, product_id)
+    
+    # Check for an exact FAQ repeat first, then fall back to vector search for paraphrases
+    exact_match = await find_exact_faq(message, owner_id=user_id, product_id=faq_product_id)
+    if exact_match:
+        faq_results = [exact_match]
+    else:
+        if on_exact_miss:
+            on_exact_miss()
+        faq_results = await search_vector_database(
+            message,
+            threshold=ai_config.faq_threshold,
+            owner_id=user_id,
+            product_id=faq_product_id,
+        )
+    
+    if faq_results and len(faq_results) > 0 and faq_results[0]["score"] >= ai_config.faq_threshold:
+        return faq_results[0]
+    return None
+
+async def answer_from_faq(
+    message: str,
+    user_id: int,
+    ai_config: AgentConfig,
+    product_id: Optional[int] = None,
+    timings: Optional[Dict[str, float]] = None,
+    on_exact_miss: Optional[Callable[[], None]] = None,
+) -> Optional[str]:
+    """
+    Answer from the store's FAQs if one matches well enough, and remember the interaction.
+    A search that misses its deadline counts as no match.
+    """
+    match = await chat_stages.run(
+        "faq", search_faq(message, user_id, ai_config, product_id, on_exact_miss), settings.CHAT_FAQ_TIMEOUT, timings
+    )
+    if match is None:
+        return None
+    
+    # Store the interaction in memory
+    remember(user_id, "faq_response", {
+        "query": message,
+        "response": match["answer"],
+        "score": match["score"]
+    })
+    return match["answer"]
+
+async def lookup_cached_response(message: str, cache_key: Any, version: str) -> Tuple[List[float], Optional[str]]:
+    """
+    Embed the message and look for a recent response to a near-identical question.
+    """
+    query_embedding = await get_embeddings(message)
+    return query_embedding, response_cache.lookup(cache_key, query_embedding, version)
+
+def start_cache_lookup(message: str, cache_key: Any, version: str, timings: Dict[str, float]) -> "asyncio.Future[Tuple[Optional[List[float]], Optional[str]]]":
+    """
+    Start the response cache lookup so it runs alongside the vector search.
+    A lookup that misses its deadline leaves generation to embed the message itself.
+    """
+    return asyncio.ensure_future(chat_stages.run(
+        "response_cache",
+        lookup_cached_response(message, cache_key, version),
+        settings.CHAT_LOOKUP_TIMEOUT,
+        timings,
+        default=(None, None),
+    ))
+
+async def answer_from_faq_or_lookup(
+    message: str,
+    user_id: int,
+    ai_config: AgentConfig,
+    product_id: Optional[int],
+    cache_key: Any,
+    version: str,
+    timings: Dict[str, float],
+) -> Tuple[Optional[str], Optional["asyncio.Future[Tuple[Optional[List[float]], Optional[str]]]"]]:
+    """
+    Answer from the store's FAQs, or return the response cache lookup to continue with.
+
+    The lookup embeds the message, so it only starts once the exact FAQ lookup
+    has missed, and then runs alongside the vector search. It is None if the
+    FAQ search missed its deadline before that point.
+    """
+    lookups = []
+    faq_answer = await answer_from_faq(
+        message, user_id, ai_config, product_id, timings,
+        on_exact_miss=lambda: lookups.append(start_cache_lookup(message, cache_key, version, timings)),
+    )
+    lookup = lookups[0] if lookups else None
+    if faq_answer is not None and lookup is not None:
+        lookup.cancel()
+        lookup = None
+    return faq_answer, lookup
+
+async def process_chat_message(
+    message: str,
+    user_id: int,
+    db: Optional[Session] = None,
+    product_id: Optional[int] = None,
+    timings: Optional[Dict[str, float]] = None,
+) -> str:
     """
     Process a chat message with AI and return a response.
+    Without db, the configuration is read in a session of its own that is closed before generating.
+    Stage durations in milliseconds are added to timings, if given.
     """
+    timings = {} if timings is None else timings
+    started = time.perf_counter()
+    try:
+        return await _process_chat_message(message, user_id, db, product_id, timings)
+    finally:
+        chat_stages.record("total", (time.perf_counter() - started) * 1000, timings=timings)
+
+def _get_ai_config(db: Optional[Session], user_id: int) -> Optional[AgentConfig]:
+    if db is not None:
+        return config_cache.get_ai_config(db, user_id)
+    with session_scope() as db:
+        return config_cache.get_ai_config(db, user_id)
+
+async def _process_chat_message(message: str, user_id: int, db: Optional[Session], product_id: Optional[int], timings: Dict[str, float]) -> str:
     # Get user's AI configuration
-    ai_config = db.query(AIConfig).filter(AIConfig.user_id == user_id).first()
+    with chat_stages.measure("config", timings):
+        ai_config = _get_ai_config(db, user_id)
     
     if not ai_config or not ai_config.is_active:
         return "AI assistant is not active for this user."
     
-    # Check if we have a relevant FAQ answer
-    faq_results = await search_vector_database(message, threshold=ai_config.faq_threshold)
+    # Past an exact FAQ miss, the vector search and the response cache lookup run together
+    cache_key = (user_id, faq_product_scope(ai_config, product_id))
+    version = prompt_version(ai_config.custom_prompt)
+    faq_answer, lookup = await answer_from_faq_or_lookup(message, user_id, ai_config, product_id, cache_key, version, timings)
+    if faq_answer is not None:
+        return faq_answer
     
-    if faq_results and len(faq_results) > 0 and faq_results[0]["score"] >= ai_config.faq_threshold:
-        # Store the interaction in memory
-        await store_memory(
-            user_id=user_id,
-            interaction_type="faq_response",
-            data={
-                "query": message,
-                "response": faq_results[0]["answer"],
-                "score": faq_results[0]["score"]
-            }
+    # If no FAQ match, reuse a cached response or generate one
+    query_embedding, response = await lookup if lookup is not None else (None, None)
+    if response is None:
+        response = await chat_stages.run(
+            "generate",
+            chat_flight.do(
+                (cache_key, version, normalize_text(message)),
+                lambda: generate_response(message, cache_key, version, query_embedding, ai_config.custom_prompt),
+            ),
+            settings.CHAT_GENERATION_TIMEOUT,
+            timings,
         )
-        return faq_results[0]["answer"]
-    
-    # If no FAQ match, use OpenAI for a response
-    # This is a placeholder - in a real implementation, you would use the OpenAI API
-    response = f"I understand you're asking about: {message}. Let me help you with that."
+        if response is None:
+            return GENERATION_FALLBACK
     
     # Store the interaction in memory
-    await store_memory(
-        user_id=user_id,
-        interaction_type="ai_response",
-        data={
-            "query": message,
-            "response": response
-        }
-    )
+    remember(user_id, "ai_response", {
+        "query": message,
+        "response": response
+    })
     
     return response
 
+async def stream_chat_message(message: str, user_id: int, product_id: Optional[int] = None) -> AsyncIterator[str]:
+    """
+    Process a chat message with AI and yield the response in chunks as it is produced.
+    The configuration is read in a session of its own, so a long stream holds no database connection.
+    FAQ and cached answers arrive as a single chunk. If the consumer stops early,
+    or generation misses its deadline, generation stops and nothing is cached or remembered.
+    """
+    timings: Dict[str, float] = {}
+    started = time.perf_counter()
+    chunks = _stream_chat_message(message, user_id, product_id, timings)
+    try:
+        async for chunk in chunks:
+            yield chunk
+    finally:
+        # Close the inner stream now, not when it is garbage collected, so generation stops with the consumer
+        await chunks.aclose()
+        chat_stages.record("total", (time.perf_counter() - started) * 1000, timings=timings)
+
+async def _stream_chat_message(message: str, user_id: int, product_id: Optional[int], timings: Dict[str, float]) -> AsyncIterator[str]:
+    # Get user's AI configuration
+    with chat_stages.measure("config", timings):
+        ai_config = _get_ai_config(None, user_id)
+    
+    if not ai_config or not ai_config.is_active:
+        yield "AI assistant is not active for this user."
+        return
+    
+    # Past an exact FAQ miss, the vector search and the response cache lookup run together
+    cache_key = (user_id, faq_product_scope(ai_config, product_id))
+    version = prompt_version(ai_config.custom_prompt)
+    faq_answer, lookup = await answer_from_faq_or_lookup(message, user_id, ai_config, product_id, cache_key, version, timings)
+    if faq_answer is not None:
+        yield faq_answer
+        return
+    
+    # If no FAQ match, reuse a cached response or generate one
+    query_embedding, response = await lookup if lookup is not None else (None, None)
+    if response is not None:
+        yield response
+    else:
+        chunks = []
+        stream = generate_response_stream(message, cache_key, version, query_embedding, ai_config.custom_prompt)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.CHAT_GENERATION_TIMEOUT
+        started = time.perf_counter()
+        outcome = "ok"
+        try:
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(stream.__anext__(), timeout=max(deadline - loop.time(), 0))
+                except StopAsyncIteration:
+                    break
+                chunks.append(chunk)
+                yield chunk
+        except (GeneratorExit, asyncio.CancelledError):
+            outcome = "cancelled"
+            raise
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            print(f"Stage generate exceeded its {settings.CHAT_GENERATION_TIMEOUT}s deadline")
+        except Exception as e:
+            outcome = "error"
+            print(f"Error in stage generate: {e}")
+        finally:
+            await stream.aclose()
+            chat_stages.record("generate", (time.perf_counter() - started) * 1000, outcome, timings)
+        
+        if outcome != "ok":
+            if not chunks:
+                yield GENERATION_FALLBACK
+            return
+        response = "".join(chunks)
+    
+    # Store the interaction in memory
+    remember(user_id, "ai_response", {
+        "query": message,
+        "response": response
+    })
+
+async def generate_response(
+    message: str,
+    cache_key: Any,
+    version: str,
+    query_embedding: Optional[List[float]] = None,
+    custom_prompt: Optional[str] = None,
+) -> str:
+    """
+    Generate a response, reusing a recent response to a near-identical question.
+    """
+    return "".join([
+        chunk async for chunk in generate_response_stream(message, cache_key, version, query_embedding, custom_prompt)
+    ])
+
+async def generate_response_stream(
+    message: str,
+    cache_key: Any,
+    version: str,
+    query_embedding: Optional[List[float]] = None,
+    custom_prompt: Optional[str] = None,
+) -> AsyncIterator[str]:
+    """
+    Stream a generated response, or a recent response to a near-identical question in one chunk.
+    Pass query_embedding when the response cache was already checked with it.
+    Only a response that was streamed to the end is cached.
+    """
+    if query_embedding is None:
+        query_embedding = await get_embeddings(message)
+        response = response_cache.lookup(cache_key, query_embedding, version)
+        if response is not None:
+            yield response
+            return
+    
+    chunks = []
+    if llm_client.configured:
+        async for chunk in llm_client.stream(message, custom_prompt):
+            chunks.append(chunk)
+            yield chunk
+    else:
+        # Placeholder reply when no LLM API is configured
+        words = f"I understand you're asking about: {message}. Let me help you with that.".split(" ")
+        for i, word in enumerate(words):
+            chunk = word if i == 0 else " " + word
+            chunks.append(chunk)
+            yield chunk
+            await asyncio.sleep(0)
+    
+    response_cache.put(cache_key, message, query_embedding, "".join(chunks), version)
+
 async def check_ai_enabled(user_id: int, product_id: Optional[int] = None, db: Session = None) -> bool:
     """
     Check if AI is enabled for a user or product.
@@ -59,7 +356,7 @@ async def check_ai_enabled(user_id: int, product_id: Optional[int] = None, db: S
         return False
         
     # Get user's AI configuration
-    ai_config = db.query(AIConfig).filter(AIConfig.user_id == user_id).first()
+    ai_config = config_cache.get_ai_config(db, user_id)
     
     if not ai_config or not ai_config.is_active:
         return False
@@ -71,7 +368,6 @@ async def check_ai_enabled(user_id: int, product_id: Optional[int] = None, db: S
         return True
     elif ai_config.store_level == StoreLevel.PRODUCT and product_id:
         # Check if AI is enabled for this specific product
-        product = db.query(Product).filter(Product.id == product_id).first()
-        return product and product.ai_enabled
+        return config_cache.product_ai_enabled(db, product_id)
     
     return False
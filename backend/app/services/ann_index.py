@@ -0,0 +1,159 @@
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+
+CENTROIDS_FILE = "ivf_centroids.npy"
+ASSIGNMENTS_FILE = "ivf_assign.i32"
+TRAIN_POINTS_PER_LIST = 32
+TRAIN_ITERATIONS = 8
+ASSIGN_CHUNK_ROWS = 8192
+
+
+def train_centroids(data: np.ndarray, nlist: int, iterations: int = TRAIN_ITERATIONS, seed: int = 0) -> np.ndarray:
+    """Spherical k-means over unit vectors; returns nlist unit centroids."""
+    rng = np.random.default_rng(seed)
+    nlist = min(nlist, len(data))
+    centroids = data[rng.choice(len(data), nlist, replace=False)].copy()
+    for _ in range(iterations):
+        labels = nearest_centroids(data, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, data)
+        norms = np.linalg.norm(sums, axis=1)
+        empty = norms == 0
+        # Re-seed empty lists from random points so every list stays useful
+        sums[empty] = data[rng.choice(len(data), int(empty.sum()))]
+        norms[empty] = 1.0
+        centroids = (sums / norms[:, None]).astype(np.float32)
+    return centroids
+
+
+def nearest_centroids(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    labels = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), ASSIGN_CHUNK_ROWS):
+        end = min(start + ASSIGN_CHUNK_ROWS, len(vectors))
+        labels[start:end] = np.argmax(vectors[start:end] @ centroids.T, axis=1)
+    return labels
+
+
+class IVFIndex:
+    """
+    Inverted-file ANN index over the rows of a LocalFaqIndex.
+
+    Rows are grouped by their nearest k-means centroid; a query scores only
+    the rows in its nprobe closest lists. Centroids are saved once after
+    training and row assignments live in a memory-mapped file that is updated
+    in place, so inserts and deletes are incremental and a restart rebuilds
+    the lists from disk without re-clustering.
+    """
+
+    def __init__(self, path: str, dimension: int, nlist: int = 256):
+        self.path = path
+        self.dimension = dimension
+        self.nlist = nlist
+        self.centroids: Optional[np.ndarray] = None
+        # Stored as list id + 1 so that zero-filled growth means "unassigned"
+        self._assign: Optional[np.memmap] = None
+        self._lists: List[List[int]] = []
+        self._list_arrays: Dict[int, np.ndarray] = {}
+
+    @property
+    def centroids_path(self) -> str:
+        return os.path.join(self.path, CENTROIDS_FILE)
+
+    @property
+    def assignments_path(self) -> str:
+        return os.path.join(self.path, ASSIGNMENTS_FILE)
+
+    @property
+    def trained(self) -> bool:
+        return self.centroids is not None
+
+    @property
+    def train_size(self) -> int:
+        """Rows needed before training is worthwhile."""
+        return self.nlist * TRAIN_POINTS_PER_LIST
+
+    def open(self, capacity: int) -> None:
+        if os.path.exists(self.centroids_path):
+            self.centroids = np.load(self.centroids_path)
+        self.resize(capacity)
+        self._rebuild_lists()
+
+    def close(self) -> None:
+        if self._assign is not None:
+            self._assign.flush()
+            self._assign = None
+
+    def resize(self, capacity: int) -> None:
+        if self._assign is not None:
+            self._assign.flush()
+            self._assign = None
+        with open(self.assignments_path, "ab") as f:
+            if f.tell() < capacity * 4:
+                f.truncate(capacity * 4)
+        self._assign = np.memmap(self.assignments_path, dtype=np.int32, mode="r+", shape=(capacity,))
+
+    def _rebuild_lists(self) -> None:
+        self._lists = [[] for _ in range(len(self.centroids))] if self.trained else []
+        self._list_arrays = {}
+        if not self.trained:
+            return
+        assigned = np.asarray(self._assign)
+        rows = np.flatnonzero(assigned)
+        order = rows[np.argsort(assigned[rows], kind="stable")]
+        labels = assigned[order] - 1
+        bounds = np.searchsorted(labels, np.arange(len(self._lists) + 1))
+        for list_id in range(len(self._lists)):
+            self._lists[list_id] = order[bounds[list_id]:bounds[list_id + 1]].tolist()
+
+    def unassigned(self, rows: np.ndarray) -> np.ndarray:
+        """Subset of rows that have no list yet."""
+        return rows[np.asarray(self._assign[rows]) == 0]
+
+    def train(self, sample: np.ndarray) -> None:
+        """Cluster a sample of unit vectors and drop any previous assignments."""
+        self.centroids = train_centroids(sample, self.nlist)
+        np.save(self.centroids_path, self.centroids)
+        self._assign[:] = 0
+        self._assign.flush()
+        self._rebuild_lists()
+
+    def add(self, rows: np.ndarray, vectors: np.ndarray) -> None:
+        """Assign rows (new or overwritten) to their nearest list."""
+        if not self.trained or len(rows) == 0:
+            return
+        self.remove(rows)
+        labels = nearest_centroids(vectors, self.centroids)
+        for row, label in zip(rows.tolist(), labels.tolist()):
+            self._lists[label].append(row)
+            self._list_arrays.pop(label, None)
+        self._assign[rows] = labels + 1
+
+    def remove(self, rows: np.ndarray) -> None:
+        if not self.trained or len(rows) == 0:
+            return
+        for row in rows.tolist():
+            label = int(self._assign[row]) - 1
+            if label >= 0:
+                self._lists[label].remove(row)
+                self._list_arrays.pop(label, None)
+        self._assign[rows] = 0
+
+    def flush(self) -> None:
+        self._assign.flush()
+
+    def _list_rows(self, list_id: int) -> np.ndarray:
+        rows = self._list_arrays.get(list_id)
+        if rows is None:
+            rows = self._list_arrays[list_id] = np.asarray(self._lists[list_id], dtype=np.int64)
+        return rows
+
+    def candidates(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        """Sorted rows of the nprobe lists whose centroids are closest to query."""
+        nprobe = max(1, min(nprobe, len(self.centroids)))
+        closeness = self.centroids @ query
+        probes = np.argpartition(-closeness, nprobe - 1)[:nprobe]
+        rows = np.concatenate([self._list_rows(int(list_id)) for list_id in probes])
+        rows.sort()
+        return rows
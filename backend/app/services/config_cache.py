@@ -0,0 +1,97 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.ai_config import AIConfig
+from app.models.product import Product
+from app.schemas.ai_agent import AgentConfig
+
+# Cached "no such row", so users without an AI configuration do not hit the database either
+_MISSING = object()
+
+
+class ConfigCache:
+    """
+    Short-lived cache of the configuration read on every chat message.
+
+    Holds each user's AI configuration, as a detached AgentConfig, and each
+    product's ai_enabled flag for ttl seconds. Writers invalidate entries
+    explicitly, so the TTL only bounds staleness across workers. Entries are
+    an LRU bounded to max_entries.
+    """
+
+    def __init__(self, ttl: float = 30.0, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _get(self, key: Hashable) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def _put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_ai_config(self, db: Session, user_id: int) -> Optional[AgentConfig]:
+        """The user's AI configuration, or None if they have not configured the agent."""
+        value = self._get(("ai_config", user_id))
+        if value is None:
+            ai_config = db.query(AIConfig).filter(AIConfig.user_id == user_id).first()
+            value = _MISSING if ai_config is None else AgentConfig.construct(
+                is_active=ai_config.is_active,
+                store_level=ai_config.store_level,
+                faq_threshold=ai_config.faq_threshold,
+                custom_prompt=ai_config.custom_prompt,
+            )
+            self._put(("ai_config", user_id), value)
+        return None if value is _MISSING else value
+
+    def product_ai_enabled(self, db: Session, product_id: int) -> bool:
+        value = self._get(("product_ai", product_id))
+        if value is None:
+            product = db.query(Product.ai_enabled).filter(Product.id == product_id).first()
+            value = bool(product and product.ai_enabled)
+            self._put(("product_ai", product_id), value)
+        return value
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            self._entries.pop(("ai_config", user_id), None)
+
+    def invalidate_product(self, product_id: int) -> None:
+        with self._lock:
+            self._entries.pop(("product_ai", product_id), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+# Initialize configuration cache
+config_cache = ConfigCache(ttl=settings.CONFIG_CACHE_TTL, max_entries=settings.CONFIG_CACHE_SIZE)
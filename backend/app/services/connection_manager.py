@@ -0,0 +1,263 @@
+import time
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+from fastapi import WebSocket, WebSocketDisconnect, status
+
+from app.core.config import settings
+from app.services.pubsub import InMemoryBroker, PubSubBroker, create_broker
+
+# Clients may send this to keep an idle chat open; it is answered without touching the AI pipeline
+HEARTBEAT_PING = "ping"
+HEARTBEAT_PONG = "pong"
+
+
+def user_channel(user_id: int) -> str:
+    """Broker channel carrying server-initiated messages for one user's sockets."""
+    return f"chat:user:{user_id}"
+
+
+class ChatConnection:
+    """One open chat WebSocket and its bounded outgoing queue."""
+
+    def __init__(self, websocket: WebSocket, user_id: int, queue_size: int, subscribed: bool = True):
+        self.websocket = websocket
+        self.user_id = user_id
+        # Only sockets authenticated as user_id receive the user's server-initiated messages
+        self.subscribed = subscribed
+        self.queue: "asyncio.Queue[str]" = asyncio.Queue(maxsize=queue_size)
+        self.inbox: "asyncio.Queue[str]" = asyncio.Queue(maxsize=queue_size)
+        self.connected_at = time.monotonic()
+        self.busy = False
+        self.overflowed = False
+        self.sent = 0
+
+    def send(self, text: str) -> bool:
+        """Queue text for the client; returns False if the client is not keeping up."""
+        try:
+            self.queue.put_nowait(text)
+            return True
+        except asyncio.QueueFull:
+            self.overflowed = True
+            return False
+
+
+class ConnectionManager:
+    """
+    Registry and lifecycle of chat WebSockets.
+
+    At most max_connections sockets are open at once; further clients are
+    refused with 1013 (try again later). Outgoing messages go through a
+    per-connection queue of queue_size drained by its own task, and a client
+    that lets it fill up is disconnected instead of buffering without bound.
+    A socket that sends nothing, not even a heartbeat ping, for idle_timeout
+    seconds while no reply is in progress is closed. Incoming messages are
+    read while a handler runs, so a disconnect cancels the reply in progress.
+    Handlers get no state from the socket, so database sessions can be opened
+    per message rather than per connection.
+
+    Server-initiated messages go through publish() and a pub/sub broker: each
+    worker subscribes to the channels of the users connected to it, so a
+    message reaches the user's sockets whichever worker or node holds them.
+    Sockets connected with subscribe=False chat but never receive them.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 1000,
+        queue_size: int = 32,
+        idle_timeout: float = 300.0,
+        broker: Optional[PubSubBroker] = None,
+    ):
+        self.max_connections = max_connections
+        self.queue_size = queue_size
+        self.idle_timeout = idle_timeout
+        self.broker = broker or InMemoryBroker()
+        self._connections: Dict[int, Set[ChatConnection]] = {}
+        self._subscribed: Set[int] = set()
+        self._count = 0
+        self.accepted = 0
+        self.rejected = 0
+        self.idle_closed = 0
+        self.slow_closed = 0
+        self.cancelled = 0
+        self.published = 0
+        self.delivered = 0
+
+    async def start(self) -> None:
+        await self.broker.connect()
+
+    async def stop(self) -> None:
+        await self.broker.close()
+        self._subscribed.clear()
+
+    async def connect(self, websocket: WebSocket, user_id: int, subscribe: bool = True) -> Optional[ChatConnection]:
+        """
+        Accept the socket if there is room, or refuse it and return None.
+        With subscribe, the socket also receives messages published to user_id.
+        """
+        if self._count >= self.max_connections:
+            self.rejected += 1
+            await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+            return None
+        # Reserve the slot before awaiting so concurrent handshakes cannot overshoot the cap
+        connection = ChatConnection(websocket, user_id, self.queue_size, subscribed=subscribe)
+        self._connections.setdefault(user_id, set()).add(connection)
+        self._count += 1
+        try:
+            await websocket.accept()
+        except Exception:
+            self._remove(connection)
+            raise
+        self.accepted += 1
+        await self._sync_subscription(user_id)
+        return connection
+
+    def _remove(self, connection: ChatConnection) -> None:
+        connections = self._connections.get(connection.user_id)
+        if connections is not None and connection in connections:
+            connections.discard(connection)
+            self._count -= 1
+            if not connections:
+                del self._connections[connection.user_id]
+
+    async def _sync_subscription(self, user_id: int) -> None:
+        """Subscribe to a user's channel while they have subscribed sockets here, and unsubscribe once they are gone."""
+        wanted = any(connection.subscribed for connection in self._connections.get(user_id, ()))
+        if wanted == (user_id in self._subscribed):
+            return
+        # State changes before awaiting, so a quick reconnect cannot be undone by a late unsubscribe
+        try:
+            if wanted:
+                self._subscribed.add(user_id)
+                await self.broker.subscribe(user_channel(user_id), lambda text: self.send_to_user(user_id, text))
+            else:
+                self._subscribed.discard(user_id)
+                await self.broker.unsubscribe(user_channel(user_id))
+        except Exception as e:
+            print(f"Error updating chat subscription for user {user_id}: {e}")
+
+    def send_to_user(self, user_id: int, text: str) -> int:
+        """Queue text on every subscribed socket of a user open on this worker; returns how many accepted it."""
+        accepted = sum(
+            connection.send(text) for connection in list(self._connections.get(user_id, ())) if connection.subscribed
+        )
+        self.delivered += accepted
+        return accepted
+
+    async def publish(self, user_id: int, text: str) -> None:
+        """Send text to every open socket of a user, on any worker sharing the broker."""
+        await self.broker.publish(user_channel(user_id), text)
+        self.published += 1
+
+    async def serve(self, connection: ChatConnection, handle: Callable[[ChatConnection, str], Awaitable[None]]) -> None:
+        """
+        Feed incoming messages to handle one at a time until the socket closes.
+        handle replies through connection.send(), as often as it likes.
+        """
+        sender = asyncio.create_task(self._send_loop(connection))
+        reader = asyncio.create_task(self._read_loop(connection))
+        websocket = connection.websocket
+        try:
+            while True:
+                incoming = asyncio.create_task(connection.inbox.get())
+                await asyncio.wait({incoming, reader}, return_when=asyncio.FIRST_COMPLETED)
+                if not incoming.done():
+                    # Disconnected or idle
+                    incoming.cancel()
+                    return
+                text = incoming.result()
+                if text == HEARTBEAT_PING:
+                    connection.send(HEARTBEAT_PONG)
+                    continue
+
+                connection.busy = True
+                work = asyncio.create_task(handle(connection, text))
+                await asyncio.wait({work, reader, sender}, return_when=asyncio.FIRST_COMPLETED)
+                connection.busy = False
+                if not work.done():
+                    # The client went away mid-reply; stop generating for it
+                    self.cancelled += 1
+                    work.cancel()
+                    try:
+                        await work
+                    except asyncio.CancelledError:
+                        pass
+                    return
+                work.result()
+                if connection.overflowed:
+                    self.slow_closed += 1
+                    await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+                    return
+        finally:
+            reader.cancel()
+            sender.cancel()
+            self._remove(connection)
+            await self._sync_subscription(connection.user_id)
+
+    async def _read_loop(self, connection: ChatConnection) -> None:
+        websocket = connection.websocket
+        try:
+            while True:
+                try:
+                    text = await asyncio.wait_for(websocket.receive_text(), timeout=self.idle_timeout)
+                except asyncio.TimeoutError:
+                    if connection.busy or not connection.inbox.empty():
+                        continue
+                    self.idle_closed += 1
+                    await websocket.close(code=status.WS_1001_GOING_AWAY)
+                    return
+                # Waits while the client is this far ahead of the replies
+                await connection.inbox.put(text)
+        except WebSocketDisconnect:
+            pass
+
+    async def _send_loop(self, connection: ChatConnection) -> None:
+        try:
+            while True:
+                text = await connection.queue.get()
+                await connection.websocket.send_text(text)
+                connection.sent += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # The client went away; the receive loop notices and cleans up
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        depths = [connection.queue.qsize() for connections in self._connections.values() for connection in connections]
+        return {
+            "active": self._count,
+            "users": len(self._connections),
+            "max_connections": self.max_connections,
+            "queued": sum(depths),
+            "max_queue_depth": max(depths, default=0),
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "idle_closed": self.idle_closed,
+            "slow_closed": self.slow_closed,
+            "cancelled": self.cancelled,
+            "published": self.published,
+            "delivered": self.delivered,
+        }
+
+
+# Initialize chat WebSocket manager
+connection_manager = ConnectionManager(
+    max_connections=settings.WS_MAX_CONNECTIONS,
+    queue_size=settings.WS_SEND_QUEUE_SIZE,
+    idle_timeout=settings.WS_IDLE_TIMEOUT,
+    broker=create_broker(settings.PUBSUB_BACKEND),
+)
+
+async def startup_chat() -> None:
+    """
+    Connect the chat pub/sub broker when the application starts.
+    """
+    await connection_manager.start()
+
+async def shutdown_chat() -> None:
+    """
+    Disconnect the chat pub/sub broker when the application stops.
+    """
+    await connection_manager.stop()
@@ -4,6 +4,7 @@ from sqlalchemy.orm import Session
 
 from app.models.order import Order, OrderStatus
 from app.models.product import Product, ProductType
+from app.services.connection_manager import connection_manager
 
 async def deliver_digital_product(order_id: int, db: Session) -> Dict[str, Any]:
     """
@@ -68,6 +69,17 @@ async def deliver_digital_product(order_id: int, db: Session) -> Dict[str, Any]:
     order.delivery_data = json.dumps(delivery_data)
     db.commit()
     
+    # Tell the buyer's open chats; the delivered content itself is not sent over the broker
+    try:
+        await connection_manager.publish(order.user_id, json.dumps({
+            "type": "order_delivered",
+            "order_id": order.id,
+            "product_id": product.id,
+            "message": "Your order has been delivered",
+        }))
+    except Exception as e:
+        print(f"Error publishing delivery notice: {e}")
+    
     return {
         "success": True,
         "message": "Product delivered successfully",
@@ -0,0 +1,170 @@
+import time
+import asyncio
+from bisect import bisect_left
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Sequence, Set, Tuple
+
+# Histogram bucket upper bounds
+BATCH_SIZE_BOUNDS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+QUEUE_WAIT_MS_BOUNDS = (0.1, 0.5, 1, 2, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """Counts of observed values per bucket, keyed "<=bound" plus one ">last" overflow bucket."""
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def stats(self) -> Dict[str, Any]:
+        buckets = {f"<={bound:g}": count for bound, count in zip(self.bounds, self.counts)}
+        buckets[f">{self.bounds[-1]:g}"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "avg": self.total / self.count if self.count else 0.0,
+            "buckets": buckets,
+        }
+
+
+class EmbeddingBatcher:
+    """
+    Micro-batches embedding requests from concurrent callers.
+
+    embed() queues each text with a future and awaits them. A background
+    task sends queued texts to embed_batch in one call as soon as max_batch
+    are waiting or the oldest has waited max_wait seconds, then resolves
+    every future from the result. Up to max_concurrency batches are embedded
+    at once, so a slow backend does not stop the next batch from forming.
+    """
+
+    def __init__(
+        self,
+        embed_batch: Callable[[List[str]], Awaitable[List[List[float]]]],
+        max_batch: int = 64,
+        max_wait: float = 0.005,
+        max_concurrency: int = 4,
+    ):
+        self.embed_batch = embed_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.max_concurrency = max_concurrency
+        self._queue: Deque[Tuple[str, "asyncio.Future[List[float]]", float]] = deque()
+        self._wakeup = asyncio.Event()
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._task: Optional[asyncio.Task] = None
+        self._in_flight: Set[asyncio.Task] = set()
+        self.enqueued = 0
+        self.embedded = 0
+        self.failed = 0
+        self.batches = 0
+        self.batch_sizes = Histogram(BATCH_SIZE_BOUNDS)
+        self.queue_wait_ms = Histogram(QUEUE_WAIT_MS_BOUNDS)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            # Events and semaphores belong to the loop that first waits on them
+            self._wakeup = asyncio.Event()
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Embed whatever is still queued and stop the background task."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while self._queue:
+            await self._embed(self._take_batch())
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embeddings for texts, computed together with other callers' texts."""
+        if not texts:
+            return []
+        self.start()
+        loop = asyncio.get_running_loop()
+        now = time.perf_counter()
+        futures = []
+        for text in texts:
+            future = loop.create_future()
+            self._queue.append((text, future, now))
+            futures.append(future)
+        self.enqueued += len(texts)
+        self._wakeup.set()
+        return list(await asyncio.gather(*futures))
+
+    def _take_batch(self) -> List[Tuple[str, "asyncio.Future[List[float]]", float]]:
+        return [self._queue.popleft() for _ in range(min(self.max_batch, len(self._queue)))]
+
+    async def _run(self) -> None:
+        while True:
+            if not self._queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            # Hold a partial batch open until the oldest request has waited long enough
+            remaining = self._queue[0][2] + self.max_wait - time.perf_counter()
+            if len(self._queue) < self.max_batch and remaining > 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._slots.acquire()
+            task = asyncio.get_running_loop().create_task(self._embed(self._take_batch()))
+            self._in_flight.add(task)
+            task.add_done_callback(self._finished)
+
+    def _finished(self, task: asyncio.Task) -> None:
+        self._in_flight.discard(task)
+        self._slots.release()
+
+    async def _embed(self, batch: List[Tuple[str, "asyncio.Future[List[float]]", float]]) -> None:
+        started = time.perf_counter()
+        for _, _, enqueued_at in batch:
+            self.queue_wait_ms.observe((started - enqueued_at) * 1000)
+        self.batch_sizes.observe(len(batch))
+        self.batches += 1
+        try:
+            vectors = await self.embed_batch([text for text, _, _ in batch])
+            if len(vectors) != len(batch):
+                raise ValueError(f"Expected {len(batch)} embeddings, got {len(vectors)}")
+        except Exception as e:
+            self.failed += len(batch)
+            print(f"Error embedding batch of {len(batch)}: {e}")
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self.embedded += len(batch)
+        for (_, future, _), vector in zip(batch, vectors):
+            # A caller that gave up has a cancelled future
+            if not future.done():
+                future.set_result(vector)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": len(self._queue),
+            "in_flight_batches": len(self._in_flight),
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000,
+            "enqueued": self.enqueued,
+            "embedded": self.embedded,
+            "failed": self.failed,
+            "batches": self.batches,
+            "batch_size": self.batch_sizes.stats(),
+            "queue_wait_ms": self.queue_wait_ms.stats(),
+        }
@@ -0,0 +1,185 @@
+import os
+import asyncio
+import hashlib
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+
+def normalize_text(text: str) -> str:
+    """Fold case and collapse whitespace so trivially different inputs share a key."""
+    return " ".join(text.lower().split())
+
+
+class EmbeddingCache:
+    """
+    Two-tier cache of text embeddings.
+
+    Keys are a SHA-256 of the embedding model and the normalized text. The
+    first tier is a size-bounded in-memory LRU; the optional second tier is a
+    SQLite file so embeddings survive restarts. Disk hits are promoted into
+    memory. Disk reads and writes run in a thread, and writes are buffered so
+    concurrent callers share one executemany and commit.
+    """
+
+    def __init__(self, max_size: int = 10000, disk_path: Optional[str] = None, model: str = ""):
+        self.max_size = max_size
+        self.disk_path = disk_path
+        self.model = model
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._unwritten: Dict[str, bytes] = {}
+        self._flush: Optional[asyncio.Task] = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.disk_writes = 0
+        self.disk_commits = 0
+
+    def key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+    def _disk(self) -> Optional[sqlite3.Connection]:
+        if self._db is None and self.disk_path:
+            directory = os.path.dirname(self.disk_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.disk_path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+        return self._db
+
+    def _remember(self, key: str, vector: List[float]) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+
+    def _read_disk(self, keys: List[str]) -> Dict[str, bytes]:
+        with self._db_lock:
+            db = self._disk()
+            if db is None:
+                return {}
+            found: Dict[str, bytes] = {}
+            # Stay under SQLite's limit on bound parameters
+            for offset in range(0, len(keys), 500):
+                chunk = keys[offset:offset + 500]
+                placeholders = ",".join("?" * len(chunk))
+                found.update(db.execute(f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk).fetchall())
+            return found
+
+    def _write_disk(self, rows: List[Tuple[str, bytes]]) -> None:
+        with self._db_lock:
+            db = self._disk()
+            if db is None:
+                return
+            db.executemany("INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", rows)
+            db.commit()
+
+    async def get_many(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Cached embeddings for texts, with None for each miss; the disk is read once for all memory misses."""
+        keys = [self.key(text) for text in texts]
+        vectors: List[Optional[List[float]]] = [None] * len(texts)
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    vectors[i] = vector
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing and self.disk_path:
+            # Written but not yet flushed entries are served from the buffer
+            found = {keys[i]: self._unwritten[keys[i]] for i in missing if keys[i] in self._unwritten}
+            rest = list({keys[i] for i in missing} - found.keys())
+            if rest:
+                found.update(await asyncio.to_thread(self._read_disk, rest))
+            with self._lock:
+                for i in missing:
+                    blob = found.get(keys[i])
+                    if blob is not None:
+                        vectors[i] = array("f", blob).tolist()
+                        self._remember(keys[i], vectors[i])
+                        self.disk_hits += 1
+        self.misses += sum(1 for vector in vectors if vector is None)
+        return vectors
+
+    async def get(self, text: str) -> Optional[List[float]]:
+        """Return the cached embedding for text, or None on a miss."""
+        return (await self.get_many([text]))[0]
+
+    def put_many(self, texts: List[str], vectors: List[List[float]]) -> None:
+        """Store embeddings in memory now and queue them for the disk tier."""
+        keys = [self.key(text) for text in texts]
+        with self._lock:
+            for key, vector in zip(keys, vectors):
+                self._remember(key, vector)
+        if not self.disk_path:
+            return
+        for key, vector in zip(keys, vectors):
+            self._unwritten[key] = array("f", vector).tobytes()
+        if self._flush is None or self._flush.done():
+            self._flush = asyncio.get_running_loop().create_task(self._flush_unwritten())
+
+    def put(self, text: str, vector: List[float]) -> None:
+        """Store an embedding in both tiers."""
+        self.put_many([text], [vector])
+
+    async def _flush_unwritten(self) -> None:
+        # Puts arriving while a commit is in progress go into the next one
+        while self._unwritten:
+            rows = list(self._unwritten.items())
+            try:
+                await asyncio.to_thread(self._write_disk, rows)
+                self.disk_writes += len(rows)
+                self.disk_commits += 1
+            except Exception as e:
+                print(f"Error writing embeddings to disk cache: {e}")
+            for key, blob in rows:
+                if self._unwritten.get(key) is blob:
+                    del self._unwritten[key]
+
+    def clear(self) -> None:
+        """Drop the in-memory tier; the disk tier is kept."""
+        with self._lock:
+            self._memory.clear()
+
+    async def close(self) -> None:
+        """Write out buffered embeddings and close the disk tier."""
+        if self._flush is not None:
+            await self._flush
+            self._flush = None
+        if self._unwritten:
+            await asyncio.to_thread(self._write_disk, list(self._unwritten.items()))
+            self._unwritten.clear()
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.memory_hits + self.disk_hits
+        total = hits + self.misses
+        return {
+            "size": len(self._memory),
+            "max_size": self.max_size,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "disk_writes": self.disk_writes,
+            "disk_commits": self.disk_commits,
+            "hit_rate": hits / total if total else 0.0,
+        }
+
+
+# Initialize embedding cache
+embedding_cache = EmbeddingCache(
+    max_size=settings.EMBEDDING_CACHE_SIZE,
+    disk_path=settings.EMBEDDING_CACHE_PATH or None,
+    model=settings.EMBEDDING_MODEL,
+)
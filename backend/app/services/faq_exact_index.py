@@ -0,0 +1,190 @@
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+
+
+def normalize_question(text: str) -> str:
+    """
+    Fold case, punctuation and whitespace into a lookup key.
+
+    Words are kept as they are: small words such as "sudah"/"belum" or
+    "can"/"is" often decide what is being asked, and an exact hit is answered
+    without any similarity check.
+    """
+    folded = "".join(
+        " " if unicodedata.category(ch).startswith("P") else ch
+        for ch in unicodedata.normalize("NFKC", text).lower()
+    )
+    return " ".join(folded.split())
+
+
+class _Namespace:
+    """Entries of one namespace, keyed by normalized question."""
+
+    def __init__(self):
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.keys_by_id: Dict[str, str] = {}
+        self.expires_at = 0.0
+
+    def add(self, faq_id: str, question: str, answer: str) -> None:
+        key = normalize_question(question)
+        if not key:
+            return
+        self.remove(faq_id)
+        previous = self.entries.get(key)
+        if previous is not None:
+            self.keys_by_id.pop(previous["id"], None)
+        self.entries[key] = {"id": faq_id, "question": question, "answer": answer}
+        self.keys_by_id[faq_id] = key
+
+    def remove(self, faq_id: str) -> None:
+        key = self.keys_by_id.pop(faq_id, None)
+        if key is not None and self.entries.get(key, {}).get("id") == faq_id:
+            del self.entries[key]
+
+
+class FaqExactIndex:
+    """
+    Hash index from (namespace, normalized FAQ question) to its answer.
+
+    Answers exact (after normalization) repeats in O(1) so only paraphrases
+    need an embedding and a vector search. Namespaces match the vector store
+    partitions and are filled from the store the first time they are used.
+
+    Other workers change the store too, so a loaded namespace expires after
+    ttl seconds and is read again on its next use; at most max_namespaces
+    are kept, least recently used first out. Changes made through this
+    process while a namespace is being read are replayed on the result, so a
+    load cannot bring back an FAQ deleted in the meantime.
+
+    Only stores that can list their entries (the local store) fill a
+    namespace completely. On Pinecone the index holds just the FAQs stored
+    through this process since the namespace was last read; every other question
+    falls back to vector search, which still finds them.
+    """
+
+    def __init__(self, ttl: float = 300.0, max_namespaces: int = 1024):
+        self.ttl = ttl
+        self.max_namespaces = max(1, max_namespaces)
+        self._namespaces: "OrderedDict[str, _Namespace]" = OrderedDict()
+        self._loading: Dict[str, List[Tuple[str, tuple]]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return sum(len(ns.entries) for ns in self._namespaces.values())
+
+    def add(self, faq_id: str, question: str, answer: str, namespace: str = "") -> None:
+        with self._lock:
+            self._apply(namespace, "add", (faq_id, question, answer))
+
+    def remove(self, faq_id: str, namespace: str = "") -> None:
+        with self._lock:
+            self._apply(namespace, "remove", (faq_id,))
+
+    def _apply(self, namespace: str, op: str, args: tuple) -> None:
+        # Called with the lock held
+        # A namespace that is not loaded is read from the store on its next use
+        loaded = self._namespaces.get(namespace)
+        if loaded is not None:
+            getattr(loaded, op)(*args)
+        pending = self._loading.get(namespace)
+        if pending is not None:
+            pending.append((op, args))
+
+    def is_loaded(self, namespace: str) -> bool:
+        with self._lock:
+            loaded = self._namespaces.get(namespace)
+            if loaded is None:
+                return False
+            if loaded.expires_at <= time.monotonic():
+                del self._namespaces[namespace]
+                return False
+            return True
+
+    @staticmethod
+    def build(items: Iterable[Dict[str, Any]]) -> _Namespace:
+        """Index stored entries given as dicts with id and metadata. Safe to run in a worker thread."""
+        built = _Namespace()
+        for item in items:
+            metadata = item.get("metadata") or {}
+            if metadata.get("question") and metadata.get("answer"):
+                built.add(item["id"], metadata["question"], metadata["answer"])
+        return built
+
+    def begin_load(self, namespace: str = "") -> None:
+        """Start recording changes to namespace until finish_load."""
+        with self._lock:
+            self._loading[namespace] = []
+
+    def finish_load(self, built: Optional[_Namespace], namespace: str = "") -> None:
+        """Install a namespace from build(), replaying changes made since begin_load; None abandons the load."""
+        with self._lock:
+            pending = self._loading.pop(namespace, [])
+            if built is None:
+                return
+            for op, args in pending:
+                getattr(built, op)(*args)
+            built.expires_at = time.monotonic() + self.ttl
+            self._namespaces[namespace] = built
+            self._namespaces.move_to_end(namespace)
+            self.loads += 1
+            self._evict()
+
+    def load(self, items: Iterable[Dict[str, Any]], namespace: str = "") -> None:
+        """Build and install a namespace in one step."""
+        self.begin_load(namespace)
+        built = None
+        try:
+            built = self.build(items)
+        finally:
+            self.finish_load(built, namespace)
+
+    def _evict(self) -> None:
+        while len(self._namespaces) > self.max_namespaces:
+            self._namespaces.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._namespaces.clear()
+            self._loading.clear()
+
+    def lookup(self, text: str, namespace: str = "") -> Optional[Dict[str, Any]]:
+        entry = None
+        with self._lock:
+            loaded = self._namespaces.get(namespace)
+            if loaded is not None:
+                self._namespaces.move_to_end(namespace)
+                entry = loaded.entries.get(normalize_question(text))
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self),
+            "namespaces": len(self._namespaces),
+            "loads": self.loads,
+            "evictions": self.evictions,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+# Initialize exact-match FAQ index
+faq_exact_index = FaqExactIndex(
+    ttl=settings.FAQ_EXACT_TTL,
+    max_namespaces=settings.FAQ_EXACT_MAX_NAMESPACES,
+)
@@ -0,0 +1,153 @@
+import io
+import csv
+import json
+import time
+import asyncio
+from typing import Any, Callable, Dict, IO, Iterable, Iterator, List, Optional
+
+from app.core.config import settings
+from app.services.vector_service import store_faqs
+
+SUPPORTED_FORMATS = ("csv", "jsonl")
+
+
+class FAQFileError(ValueError):
+    """The FAQ file could not be read to the end; report covers what was imported before."""
+
+    def __init__(self, message: str, report: Dict[str, Any]):
+        super().__init__(message)
+        self.report = report
+
+
+def detect_format(filename: str) -> str:
+    """Guess the FAQ file format from its extension."""
+    name = (filename or "").lower()
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith(".jsonl") or name.endswith(".ndjson"):
+        return "jsonl"
+    raise ValueError(f"Unsupported FAQ file: {filename} (expected .csv or .jsonl)")
+
+
+def iter_faq_records(stream: IO[str], fmt: str) -> Iterator[Optional[Dict[str, str]]]:
+    """
+    Stream FAQ records from a CSV (with question/answer columns) or JSONL file.
+    Rows that cannot be used are yielded as None so they can be counted.
+    """
+    if fmt == "csv":
+        rows: Iterable[Any] = csv.DictReader(stream)
+    elif fmt == "jsonl":
+        rows = (line for line in stream if line.strip())
+    else:
+        raise ValueError(f"Unsupported FAQ format: {fmt}")
+
+    for row in rows:
+        if fmt == "jsonl":
+            try:
+                row = json.loads(row)
+            except ValueError:
+                yield None
+                continue
+        if not isinstance(row, dict):
+            yield None
+            continue
+        question = (row.get("question") or "").strip()
+        answer = (row.get("answer") or "").strip()
+        if not question or not answer:
+            yield None
+            continue
+        yield {"question": question, "answer": answer}
+
+
+async def ingest_faqs(
+    records: Iterable[Optional[Dict[str, str]]],
+    owner_id: Optional[int] = None,
+    product_id: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Embed and store FAQs in fixed-size batches, into the FAQ partition of
+    owner_id (and product_id, if given).
+
+    Records are consumed lazily, and at most ``concurrency`` batches are in
+    flight at once, so memory stays bounded regardless of file size. Returns a
+    report with counts and throughput; on_progress receives the same report
+    after every finished batch.
+    """
+    batch_size = batch_size or settings.FAQ_IMPORT_BATCH_SIZE
+    concurrency = concurrency or settings.FAQ_IMPORT_CONCURRENCY
+
+    started = time.monotonic()
+    report: Dict[str, Any] = {
+        "read": 0,
+        "stored": 0,
+        "skipped": 0,
+        "failed": 0,
+        "batches": 0,
+        "errors": [],
+    }
+
+    async def run_batch(batch: List[Dict[str, str]]) -> None:
+        try:
+            stored = await store_faqs(batch, owner_id, product_id)
+            report["stored"] += stored
+        except Exception as e:
+            report["failed"] += len(batch)
+            if len(report["errors"]) < 10:
+                report["errors"].append(str(e))
+        report["batches"] += 1
+        if on_progress:
+            on_progress(_with_timing(report, started))
+
+    pending = set()
+    batch: List[Dict[str, str]] = []
+    try:
+        try:
+            for record in records:
+                report["read"] += 1
+                if record is None:
+                    report["skipped"] += 1
+                    continue
+                batch.append(record)
+                if len(batch) >= batch_size:
+                    if len(pending) >= concurrency:
+                        _, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    pending.add(asyncio.create_task(run_batch(batch)))
+                    batch = []
+        except (UnicodeDecodeError, csv.Error) as e:
+            # Batches already started are finished before reporting the bad file
+            if pending:
+                await asyncio.wait(pending)
+                pending = set()
+            raise FAQFileError(f"Could not read FAQ file after {report['read']} records: {e}", _with_timing(report, started))
+        if batch:
+            pending.add(asyncio.create_task(run_batch(batch)))
+        if pending:
+            await asyncio.wait(pending)
+    finally:
+        # Only reached with batches pending if the import itself was cancelled
+        for task in pending:
+            task.cancel()
+
+    return _with_timing(report, started)
+
+
+def _with_timing(report: Dict[str, Any], started: float) -> Dict[str, Any]:
+    elapsed = time.monotonic() - started
+    return {
+        **report,
+        "errors": list(report["errors"]),
+        "seconds": round(elapsed, 3),
+        "per_second": round(report["stored"] / elapsed, 1) if elapsed > 0 else 0.0,
+    }
+
+
+async def ingest_faq_file(binary: IO[bytes], fmt: str, **kwargs: Any) -> Dict[str, Any]:
+    """Ingest an open binary FAQ file (e.g. an upload) of the given format."""
+    stream = io.TextIOWrapper(binary, encoding="utf-8-sig", newline="")
+    try:
+        return await ingest_faqs(iter_faq_records(stream, fmt), **kwargs)
+    finally:
+        stream.detach()
@@ -0,0 +1,82 @@
+from typing import Any, Dict, List, Optional
+
+from app.services.graph_service import neo4j_service, RETRIEVE_MEMORIES_QUERY, STORE_MEMORIES_QUERY
+
+# Everything memory queries look nodes up or sort by; IF NOT EXISTS makes the bootstrap idempotent
+CONSTRAINTS = {
+    "user_id_unique": "CREATE CONSTRAINT user_id_unique IF NOT EXISTS FOR (u:User) REQUIRE u.id IS UNIQUE",
+    "memory_id_unique": "CREATE CONSTRAINT memory_id_unique IF NOT EXISTS FOR (m:Memory) REQUIRE m.id IS UNIQUE",
+}
+INDEXES = {
+    "memory_timestamp": "CREATE INDEX memory_timestamp IF NOT EXISTS FOR (m:Memory) ON (m.timestamp)",
+}
+
+# Queries on the chat path, with sample parameters for EXPLAIN
+HOT_QUERIES = {
+    "retrieve_memory": (RETRIEVE_MEMORIES_QUERY, {"user_id": 0, "limit": 10, "before_timestamp": None, "before_id": None}),
+    "store_memory": (STORE_MEMORIES_QUERY, {"events": [
+        {"id": "", "user_id": 0, "type": "", "data": "{}", "timestamp": "1970-01-01T00:00:00+00:00"}
+    ]}),
+}
+
+# Operators that touch every node with a label instead of seeking through an index
+SCAN_OPERATORS = ("AllNodesScan", "NodeByLabelScan")
+
+
+async def create_schema() -> None:
+    for statement in list(CONSTRAINTS.values()) + list(INDEXES.values()):
+        await neo4j_service.run_query(statement)
+
+
+async def verify_schema() -> Dict[str, Any]:
+    """
+    Check every constraint and index exists and is online.
+    Returns the state of each by name and the names that are missing or not online.
+    """
+    states: Dict[str, str] = {}
+    for record in await neo4j_service.run_query("SHOW CONSTRAINTS YIELD name"):
+        states[record["name"]] = "ONLINE"
+    for record in await neo4j_service.run_query("SHOW INDEXES YIELD name, state"):
+        # Uniqueness constraints are backed by an index of the same name; its state wins
+        states[record["name"]] = record["state"]
+
+    expected = list(CONSTRAINTS) + list(INDEXES)
+    return {
+        "states": {name: states.get(name, "MISSING") for name in expected},
+        "problems": [name for name in expected if states.get(name) != "ONLINE"],
+    }
+
+
+def _operators(plan: Dict[str, Any]) -> List[str]:
+    operators = [plan.get("operatorType", "").split("@")[0]]
+    for child in plan.get("children", []):
+        operators.extend(_operators(child))
+    return operators
+
+
+async def explain_hot_queries() -> Dict[str, Optional[Dict[str, Any]]]:
+    """Planner operators for each hot query, flagging label scans."""
+    report: Dict[str, Optional[Dict[str, Any]]] = {}
+    for name, (query, parameters) in HOT_QUERIES.items():
+        plan = await neo4j_service.explain(query, parameters)
+        if plan is None:
+            report[name] = None
+            continue
+        operators = _operators(plan)
+        report[name] = {
+            "operators": operators,
+            "scans": [op for op in operators if op in SCAN_OPERATORS],
+        }
+    return report
+
+
+async def ensure_schema(explain: bool = False) -> Dict[str, Any]:
+    """
+    Create missing constraints and indexes, then verify them.
+    With explain, also report the query plans of the hot memory queries.
+    """
+    await create_schema()
+    report = await verify_schema()
+    if explain:
+        report["plans"] = await explain_hot_queries()
+    return report
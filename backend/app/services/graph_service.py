@@ -1,8 +1,17 @@
 import os
 import json
-from typing import Dict, List, Any, Optional
-from neo4j import GraphDatabase
+import base64
+import time
+import uuid
+import asyncio
+from datetime import datetime, timezone
+from typing import Dict, List, Any, AsyncIterator, Optional, Tuple
+from neo4j import AsyncGraphDatabase
+from neo4j.exceptions import ServiceUnavailable, SessionExpired, TransientError
 from app.core.config import settings
+from app.services.memory_writer import MemoryWriter
+from app.services.memory_cache import memory_cache
+from app.services.memory_store import MemoryBackend, memory_store_client
 
 class Neo4jService:
     def __init__(self):
@@ -10,131 +19,321 @@ class Neo4jService:
         self.username = settings.NEO4J_USERNAME
         self.password = settings.NEO4J_PASSWORD
         self.driver = None
+        # Bounds concurrent queries below the pool size so waiters queue here, not in the driver
+        self._semaphore = asyncio.Semaphore(settings.NEO4J_MAX_CONCURRENCY)
+        self._connect_lock = asyncio.Lock()
+        self._retry_at = 0.0
         
-    def connect(self):
-        """Connect to Neo4j database."""
-        if not self.driver:
+    async def connect(self):
+        """
+        Connect to Neo4j database.
+        While Neo4j is unreachable, reconnects are attempted at most once per NEO4J_RETRY_INTERVAL.
+        """
+        if self.driver or time.monotonic() < self._retry_at:
+            return
+        async with self._connect_lock:
+            if self.driver or time.monotonic() < self._retry_at:
+                return
+            driver = None
             try:
-                self.driver = GraphDatabase.driver(
+                driver = AsyncGraphDatabase.driver(
                     self.uri, 
-                    auth=(self.username, self.password)
+                    auth=(self.username, self.password),
+                    max_connection_pool_size=settings.NEO4J_MAX_POOL_SIZE,
+                    connection_timeout=settings.NEO4J_CONNECTION_TIMEOUT,
+                    connection_acquisition_timeout=settings.NEO4J_CONNECTION_TIMEOUT,
                 )
+                await driver.verify_connectivity()
+                self.driver = driver
             except Exception as e:
                 print(f"Failed to connect to Neo4j: {e}")
                 # For development, we'll continue without failing
-                pass
+                self._retry_at = time.monotonic() + settings.NEO4J_RETRY_INTERVAL
+                if driver:
+                    await driver.close()
     
-    def close(self):
+    async def close(self):
         """Close the Neo4j connection."""
         if self.driver:
-            self.driver.close()
+            await self.driver.close()
+            self.driver = None
             
-    def run_query(self, query, parameters=None):
-        """Run a Cypher query."""
+    async def run_query(self, query, parameters=None):
+        """Run a Cypher query without blocking the event loop."""
         if not self.driver:
-            self.connect()
+            await self.connect()
             
         if not self.driver:
             # If still no driver, we're in development mode
             print(f"Development mode: would run query: {query}")
             return []
-            
-        with self.driver.session() as session:
-            result = session.run(query, parameters)
-            return [record for record in result]
+        
+        try:
+            async with self._semaphore:
+                async with self.driver.session() as session:
+                    result = await session.run(query, parameters)
+                    return [record async for record in result]
+        except (ServiceUnavailable, SessionExpired):
+            # Neo4j went away; back off instead of timing out on every call
+            await self.close()
+            self._retry_at = time.monotonic() + settings.NEO4J_RETRY_INTERVAL
+            raise
+
+    async def explain(self, query, parameters=None) -> Optional[Dict[str, Any]]:
+        """Return the planner's plan for a query without running it, or None without a connection."""
+        if not self.driver:
+            await self.connect()
+        if not self.driver:
+            return None
+        
+        async with self._semaphore:
+            async with self.driver.session() as session:
+                result = await session.run("EXPLAIN " + query, parameters)
+                summary = await result.consume()
+                return summary.plan
 
 # Initialize Neo4j service
 neo4j_service = Neo4jService()
 
+# One statement per batch of memory events instead of a transaction per event.
+# MERGE on the memory id makes retrying a batch whose commit did land a no-op.
+STORE_MEMORIES_QUERY = """
+UNWIND $events AS event
+MERGE (u:User {id: event.user_id})
+MERGE (m:Memory {id: event.id})
+ON CREATE SET m.type = event.type, m.data = event.data, m.timestamp = datetime(event.timestamp)
+MERGE (u)-[:HAS_MEMORY]->(m)
+"""
+
+# Keyset pagination: each page starts after the (timestamp, id) of the previous one
+RETRIEVE_MEMORIES_QUERY = """
+MATCH (u:User {id: $user_id})-[:HAS_MEMORY]->(m:Memory)
+WHERE $before_timestamp IS NULL
+   OR m.timestamp < datetime($before_timestamp)
+   OR (m.timestamp = datetime($before_timestamp) AND m.id < $before_id)
+RETURN m.id as id, m.type as type, m.data as data, m.timestamp as timestamp
+ORDER BY m.timestamp DESC, m.id DESC
+LIMIT $limit
+"""
+
+# Folds one batch of expired memories into per-user daily summaries and deletes them.
+# The LIMIT keeps every transaction small, so locks are held only briefly.
+COMPACT_MEMORIES_QUERY = """
+MATCH (u:User)-[:HAS_MEMORY]->(m:Memory)
+WHERE m.timestamp < datetime($cutoff)
+WITH u, m
+LIMIT $batch_size
+WITH u, date(m.timestamp) AS day, collect(m) AS memories,
+     count(m) AS n,
+     sum(size(coalesce(m.data, ''))) AS bytes,
+     min(m.timestamp) AS first,
+     max(m.timestamp) AS last,
+     collect(DISTINCT m.type) AS types
+MERGE (u)-[:HAS_SUMMARY]->(s:MemorySummary {day: day})
+ON CREATE SET s.count = 0, s.bytes = 0, s.types = [], s.first = first, s.last = last
+SET s.count = s.count + n,
+    s.bytes = s.bytes + bytes,
+    s.first = CASE WHEN first < s.first THEN first ELSE s.first END,
+    s.last = CASE WHEN last > s.last THEN last ELSE s.last END,
+    s.types = s.types + [t IN types WHERE NOT t IN s.types]
+FOREACH (m IN memories | DETACH DELETE m)
+RETURN sum(n) AS nodes, sum(bytes) AS bytes
+"""
+
+class Neo4jMemoryBackend(MemoryBackend):
+    """Memories as (:User)-[:HAS_MEMORY]->(:Memory) nodes in Neo4j."""
+
+    async def connect(self) -> None:
+        """
+        Connect to Neo4j and create any missing constraints and indexes unless NEO4J_INIT_SCHEMA is off.
+        """
+        await neo4j_service.connect()
+        if settings.NEO4J_INIT_SCHEMA and neo4j_service.driver:
+            # Imported here because graph_schema builds on this module
+            from app.services.graph_schema import ensure_schema
+            try:
+                report = await ensure_schema()
+                if report["problems"]:
+                    print(f"Neo4j schema not ready: {report['problems']}")
+            except Exception as e:
+                print(f"Failed to create Neo4j schema: {e}")
+
+    async def close(self) -> None:
+        await neo4j_service.close()
+
+    @property
+    def available(self) -> bool:
+        return neo4j_service.driver is not None
+
+    async def write(self, events: List[Dict[str, Any]]) -> None:
+        # run_query answers [] without a driver, which would pass for a successful write
+        if not self.available:
+            await neo4j_service.connect()
+        if not self.available:
+            raise ConnectionError("Neo4j is not connected")
+        await neo4j_service.run_query(STORE_MEMORIES_QUERY, {"events": events})
+
+    @staticmethod
+    def _memory(record: Any) -> Dict[str, Any]:
+        return {
+            "id": record["id"],
+            "type": record["type"],
+            "data": record["data"],
+            # Neo4j DateTime; report the same ISO strings as the other backends
+            "timestamp": record["timestamp"].to_native().isoformat(timespec="microseconds"),
+        }
+
+    async def recent(self, user_id: int, limit: int, before: Optional[Tuple[str, str]] = None) -> List[Dict[str, Any]]:
+        results = await neo4j_service.run_query(RETRIEVE_MEMORIES_QUERY, {
+            "user_id": user_id,
+            "limit": limit,
+            "before_timestamp": before[0] if before else None,
+            "before_id": before[1] if before else None,
+        })
+        return [self._memory(record) for record in results]
+
+    async def compact(self, cutoff: str, batch_size: int) -> Dict[str, int]:
+        records = await neo4j_service.run_query(COMPACT_MEMORIES_QUERY, {
+            "cutoff": cutoff,
+            "batch_size": batch_size,
+        })
+        if not records or not records[0]["nodes"]:
+            return {"nodes": 0, "bytes": 0}
+        return {"nodes": records[0]["nodes"], "bytes": records[0]["bytes"] or 0}
+
+async def write_memories(events: List[Dict[str, Any]]) -> None:
+    """
+    Write a batch of queued memory events to the memory backend.
+    """
+    store = await memory_store_client.get()
+    await store.write(events)
+
+# Initialize write-behind memory writer
+memory_writer = MemoryWriter(
+    write_memories,
+    max_queue=settings.MEMORY_QUEUE_SIZE,
+    batch_size=settings.MEMORY_BATCH_SIZE,
+    flush_interval=settings.MEMORY_FLUSH_INTERVAL,
+    overflow=settings.MEMORY_OVERFLOW_POLICY,
+    max_attempts=settings.MEMORY_WRITE_ATTEMPTS,
+    # Worth another try: the backend was unreachable, or Neo4j asked for a retry
+    retry_on=(ConnectionError, TimeoutError, ServiceUnavailable, SessionExpired, TransientError),
+)
+
+async def startup_graph() -> None:
+    """
+    Connect the memory backend and start the memory writer when the application starts.
+    """
+    await memory_store_client.get()
+    memory_writer.start()
+
+async def shutdown_graph() -> None:
+    """
+    Flush queued memories and close the memory backend when the application stops.
+    """
+    await memory_writer.stop()
+    await memory_store_client.close()
+
+def _format_memory(record: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        data = json.loads(record["data"])
+    except:
+        data = {}
+    return {
+        "id": record["id"],
+        "type": record["type"],
+        "data": data,
+        "timestamp": record["timestamp"]
+    }
+
 async def store_memory(user_id: int, interaction_type: str, data: Dict[str, Any]) -> bool:
     """
-    Store a memory in the graph database.
+    Queue a memory for the memory backend.
+    Returns once the memory is queued; it is written with the next batch.
     """
     try:
-        # Convert data to JSON string
-        data_json = json.dumps(data)
-        
-        # Create query
-        query = """
-        MERGE (u:User {id: $user_id})
-        CREATE (m:Memory {
-            id: randomUUID(),
-            type: $type,
-            data: $data,
-            timestamp: datetime()
-        })
-        CREATE (u)-[:HAS_MEMORY]->(m)
-        RETURN m
-        """
-        
-        # Run query
-        neo4j_service.run_query(query, {
-            "user_id": user_id,
+        # Id and timestamp are fixed now so the memory keeps its place when written later
+        memory = {
+            "id": str(uuid.uuid4()),
             "type": interaction_type,
-            "data": data_json
-        })
-        
-        return True
+            "data": data,
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="microseconds"),
+        }
+        queued = await memory_writer.put({**memory, "user_id": user_id, "data": json.dumps(data)})
+        if queued:
+            memory_cache.add(user_id, memory)
+        return queued
     except Exception as e:
-        print(f"Error storing memory in graph database: {e}")
+        print(f"Error storing memory: {e}")
         return False
 
-async def retrieve_memory(user_id: int, limit: int = 10) -> List[Dict[str, Any]]:
+def encode_memory_cursor(memory: Dict[str, Any]) -> str:
+    """Opaque cursor for the page that follows memory."""
+    key = json.dumps([memory["timestamp"], memory["id"]])
+    return base64.urlsafe_b64encode(key.encode("utf-8")).decode("ascii")
+
+def decode_memory_cursor(cursor: str) -> Tuple[str, str]:
+    """Inverse of encode_memory_cursor; raises ValueError for a malformed cursor."""
+    try:
+        timestamp, memory_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception:
+        raise ValueError("Invalid memory cursor")
+    if not isinstance(timestamp, str) or not isinstance(memory_id, str):
+        raise ValueError("Invalid memory cursor")
+    return timestamp, memory_id
+
+def _pending_memories(user_id: int, before: Optional[Tuple[str, str]] = None) -> List[Dict[str, Any]]:
+    """Memories still queued for writing, newest first; they are newer than anything stored."""
+    events = memory_writer.pending(
+        lambda event: event["user_id"] == user_id
+        and (before is None or (event["timestamp"], event["id"]) < before)
+    )
+    return [_format_memory(event) for event in reversed(events)]
+
+async def retrieve_memory(user_id: int, limit: int = 10, cursor: Optional[str] = None) -> List[Dict[str, Any]]:
     """
-    Retrieve memories for a user from the graph database.
+    Retrieve memories for a user, newest first, from the hot tier when it has them.
+    Pass encode_memory_cursor() of the last memory of a page as cursor to get the next page.
     """
+    if cursor is None:
+        cached = memory_cache.get(user_id, limit)
+        if cached is not None:
+            return cached
+    
+    before = decode_memory_cursor(cursor) if cursor else None
+    pending = _pending_memories(user_id, before)
+    
+    # A first page reads a full hot-tier buffer so the next requests can be served from it
+    fetch = limit if before else max(limit, memory_cache.depth)
     try:
-        # Create query
-        query = """
-        MATCH (u:User {id: $user_id})-[:HAS_MEMORY]->(m:Memory)
-        RETURN m.id as id, m.type as type, m.data as data, m.timestamp as timestamp
-        ORDER BY m.timestamp DESC
-        LIMIT $limit
-        """
-        
-        # Run query
-        results = neo4j_service.run_query(query, {
-            "user_id": user_id,
-            "limit": limit
-        })
-        
-        # Format results
-        memories = []
-        for record in results:
-            try:
-                data = json.loads(record["data"])
-            except:
-                data = {}
-                
-            memories.append({
-                "id": record["id"],
-                "type": record["type"],
-                "data": data,
-                "timestamp": record["timestamp"]
-            })
-        
-        return memories
+        store = await memory_store_client.get()
+        results = await store.recent(user_id, fetch, before)
     except Exception as e:
-        print(f"Error retrieving memory from graph database: {e}")
-        # For development, return mock data
-        return [
-            {
-                "id": "1",
-                "type": "faq_response",
-                "data": {
-                    "query": "How do I reset my password?",
-                    "response": "You can reset your password by clicking on the 'Forgot Password' link on the login page.",
-                    "score": 0.95
-                },
-                "timestamp": "2023-04-01T12:00:00Z"
-            },
-            {
-                "id": "2",
-                "type": "ai_response",
-                "data": {
-                    "query": "Tell me about your digital products",
-                    "response": "We offer various digital products including templates, accounts, links, and vouchers."
-                },
-                "timestamp": "2023-04-01T12:05:00Z"
-            }
-        ]
+        print(f"Error retrieving memory: {e}")
+        return pending[:limit]
+    
+    memories = pending[:fetch]
+    seen = {memory["id"] for memory in memories}
+    for record in results:
+        if record["id"] not in seen:
+            # Otherwise flushed while the read was running
+            memories.append(_format_memory(record))
+    memories.sort(key=lambda memory: (memory["timestamp"], memory["id"]), reverse=True)
+    
+    memories = memories[:fetch]
+    if before is None and fetch == memory_cache.depth:
+        memory_cache.fill(user_id, memories)
+    return memories[:limit]
+
+async def export_memory(user_id: int) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Yield every memory of a user, newest first, one backend page at a time.
+    """
+    pending = _pending_memories(user_id)
+    seen = {memory["id"] for memory in pending}
+    for memory in pending:
+        yield memory
+    store = await memory_store_client.get()
+    async for record in store.stream(user_id):
+        if record["id"] not in seen:
+            yield _format_memory(record)
@@ -0,0 +1,229 @@
+import json
+import time
+import random
+import asyncio
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.services.response_cache import prompt_version
+
+# Responses worth retrying: rate limited, or the server failed
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+BASE_SYSTEM_PROMPT = (
+    "You are the customer support assistant of a digital products store. "
+    "Answer the buyer's question briefly and only with information you are sure of."
+)
+
+
+class LLMError(Exception):
+    """The completion request failed, after any retries."""
+
+
+class LLMClient:
+    """
+    Client for an OpenAI-compatible chat completions API.
+
+    One pooled keep-alive HTTP client serves the whole process. At most
+    max_concurrency requests are in flight at once; callers beyond that wait
+    for a slot. Timeouts, 429s and 5xx responses are retried up to
+    max_retries times with jittered exponential backoff, honouring
+    Retry-After. A stream is only retried before its first chunk arrives.
+
+    Each store's system messages are built once per custom_prompt and reused,
+    so every request of a store starts with a byte-identical prefix that the
+    provider can serve from its prompt cache.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str = "",
+        model: str = "gpt-4o-mini",
+        max_concurrency: int = 32,
+        timeout: float = 30.0,
+        connect_timeout: float = 5.0,
+        max_retries: int = 2,
+        retry_base_delay: float = 0.5,
+        max_tokens: int = 512,
+        max_prefixes: int = 1024,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.max_tokens = max_tokens
+        self.max_prefixes = max_prefixes
+        self._http: Optional[httpx.AsyncClient] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._prefixes: "OrderedDict[str, List[Dict[str, str]]]" = OrderedDict()
+        self.in_flight = 0
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.prefix_hits = 0
+        self.prefix_misses = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.base_url)
+
+    def _client(self) -> httpx.AsyncClient:
+        if self._http is None:
+            headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=headers,
+                timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
+            )
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        return self._http
+
+    async def close(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+            self._slots = None
+
+    def prompt_prefix(self, custom_prompt: Optional[str]) -> List[Dict[str, str]]:
+        """System messages for a store, shared by every request with the same custom prompt."""
+        version = prompt_version(custom_prompt)
+        prefix = self._prefixes.get(version)
+        if prefix is not None:
+            self.prefix_hits += 1
+            self._prefixes.move_to_end(version)
+            return prefix
+        self.prefix_misses += 1
+        prefix = [{"role": "system", "content": BASE_SYSTEM_PROMPT}]
+        if custom_prompt:
+            prefix.append({"role": "system", "content": custom_prompt})
+        self._prefixes[version] = prefix
+        while len(self._prefixes) > self.max_prefixes:
+            self._prefixes.popitem(last=False)
+        return prefix
+
+    def build_messages(self, message: str, custom_prompt: Optional[str] = None) -> List[Dict[str, str]]:
+        return self.prompt_prefix(custom_prompt) + [{"role": "user", "content": message}]
+
+    def _payload(self, messages: List[Dict[str, str]], stream: bool) -> Dict[str, Any]:
+        return {"model": self.model, "messages": messages, "max_tokens": self.max_tokens, "stream": stream}
+
+    def _backoff(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after:
+                try:
+                    return min(float(retry_after), self.timeout)
+                except ValueError:
+                    pass
+        # Full jitter keeps workers that failed together from retrying together
+        return random.uniform(0, self.retry_base_delay * 2 ** attempt)
+
+    def _record(self, started: float) -> None:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+
+    async def complete(self, message: str, custom_prompt: Optional[str] = None) -> str:
+        """The whole completion for a buyer's message."""
+        return "".join([chunk async for chunk in self.stream(message, custom_prompt, stream=False)])
+
+    async def stream(self, message: str, custom_prompt: Optional[str] = None, stream: bool = True) -> AsyncIterator[str]:
+        """
+        Yield the completion for a buyer's message as it is generated.
+        With stream=False the completion is requested whole and yielded as one chunk.
+        """
+        client = self._client()
+        payload = self._payload(self.build_messages(message, custom_prompt), stream)
+        async with self._slots:
+            self.in_flight += 1
+            self.requests += 1
+            started = time.perf_counter()
+            try:
+                for attempt in range(self.max_retries + 1):
+                    last = attempt == self.max_retries
+                    yielded = False
+                    try:
+                        async with client.stream("POST", "/chat/completions", json=payload) as response:
+                            if response.status_code in RETRY_STATUSES and not last:
+                                delay = self._backoff(attempt, response)
+                            elif response.status_code >= 400:
+                                await response.aread()
+                                raise LLMError(f"Completion failed with {response.status_code}: {response.text[:200]}")
+                            elif not stream:
+                                body = json.loads(await response.aread())
+                                yielded = True
+                                yield body["choices"][0]["message"]["content"] or ""
+                                return
+                            else:
+                                async for chunk in self._read_events(response):
+                                    yielded = True
+                                    yield chunk
+                                return
+                    except (httpx.TimeoutException, httpx.TransportError) as e:
+                        if yielded or last:
+                            raise LLMError(f"Completion request failed: {e}") from e
+                        delay = self._backoff(attempt)
+                    # The connection goes back to the pool before waiting
+                    self.retries += 1
+                    await asyncio.sleep(delay)
+            except Exception:
+                self.failures += 1
+                raise
+            finally:
+                self.in_flight -= 1
+                self._record(started)
+
+    async def _read_events(self, response: httpx.Response) -> AsyncIterator[str]:
+        """Content deltas from a Server-Sent Events completion stream."""
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                return
+            choices = json.loads(data).get("choices") or []
+            content = choices[0].get("delta", {}).get("content") if choices else None
+            if content:
+                yield content
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "configured": self.configured,
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "requests": self.requests,
+            "retries": self.retries,
+            "failures": self.failures,
+            "prefix_hits": self.prefix_hits,
+            "prefix_misses": self.prefix_misses,
+            "avg_ms": self.total_ms / self.requests if self.requests else 0.0,
+            "max_ms": self.max_ms,
+        }
+
+
+# Initialize LLM client
+llm_client = LLMClient(
+    base_url=settings.LLM_BASE_URL,
+    api_key=settings.LLM_API_KEY,
+    model=settings.LLM_MODEL,
+    max_concurrency=settings.LLM_MAX_CONCURRENCY,
+    timeout=settings.LLM_TIMEOUT,
+    connect_timeout=settings.LLM_CONNECT_TIMEOUT,
+    max_retries=settings.LLM_MAX_RETRIES,
+    retry_base_delay=settings.LLM_RETRY_BASE_DELAY,
+    max_tokens=settings.LLM_MAX_TOKENS,
+)
@@ -0,0 +1,585 @@
+import os
+import re
+import json
+import fcntl
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.vector_store import VectorStore
+from app.services.ann_index import IVFIndex
+
+VECTORS_FILE = "vectors.f32"
+METADATA_FILE = "meta.jsonl"
+LOCK_FILE = "index.lock"
+MIN_CAPACITY = 1024
+SCORE_CHUNK_ROWS = 4096
+QUANTIZATION_MODES = ("none", "float16", "int8")
+ANN_MODES = ("none", "ivf")
+NAMESPACES_DIR = "namespaces"
+NAMESPACE_PATTERN = re.compile(r"^[A-Za-z0-9_-]+$")
+
+
+def _normalize(vector: Any) -> np.ndarray:
+    """Return vector as a unit-length float32 array (zero vectors stay zero)."""
+    v = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(v))
+    if norm > 0:
+        v = v / norm
+    return v
+
+
+def quantize(rows: np.ndarray, mode: str):
+    """
+    Quantize unit-length float32 rows.
+
+    Returns (codes, scales). float16 codes need no scale; int8 codes use one
+    float32 scale per row so that row ~= codes * scale.
+    """
+    if mode == "float16":
+        return rows.astype(np.float16), None
+    if mode == "int8":
+        scales = np.abs(rows).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.rint(rows / scales[:, None]).astype(np.int8)
+        return codes, scales.astype(np.float32)
+    raise ValueError(f"Unknown quantization mode: {mode}")
+
+
+class LocalFaqIndex:
+    """
+    FAQ embeddings kept in one contiguous float32 matrix.
+
+    Rows are stored L2-normalized in a memory-mapped file, so cosine similarity
+    is a single matrix-vector product. Row metadata lives in an append-only
+    JSONL sidecar that is replayed on load. Deleted rows are tombstoned and
+    reused by later inserts, so neither appends nor deletes rebuild the matrix.
+
+    Several processes (uvicorn workers, the import script) may open the same
+    index. Every change to the files happens under an exclusive lock on a
+    lock file, after catching up with what other processes appended to the
+    sidecar, so row allocation and compaction never conflict. Readers check
+    the sidecar's size before each query and catch up when it changed.
+
+    With quantization set to "float16" or "int8", scoring runs against an
+    in-memory quantized copy of the matrix (int8 with a per-row scale), and
+    the float32 file is only paged in to re-rank the best rerank_factor *
+    top_k candidates exactly. A rerank_factor of 0 skips the re-rank.
+
+    With ann set to "ivf", an IVFIndex is trained once enough rows exist and
+    queries only score the rows in the nprobe closest lists; until then
+    search stays exact.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        dimension: int,
+        quantization: str = "none",
+        rerank_factor: int = 0,
+        ann: str = "none",
+        nlist: int = 256,
+        nprobe: int = 8,
+    ):
+        if quantization not in QUANTIZATION_MODES:
+            raise ValueError(f"Unknown quantization mode: {quantization}")
+        if ann not in ANN_MODES:
+            raise ValueError(f"Unknown ANN mode: {ann}")
+        self.path = path
+        self.dimension = dimension
+        self.quantization = quantization
+        self.rerank_factor = rerank_factor
+        self.ann = ann
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self._ivf: Optional[IVFIndex] = None
+        self._lock = threading.RLock()
+        self._vectors: Optional[np.memmap] = None
+        self._codes: Optional[np.ndarray] = None
+        self._scales: Optional[np.ndarray] = None
+        self._alive = np.zeros(0, dtype=bool)
+        self._count = 0
+        self._ids: List[Optional[str]] = []
+        self._metadata: List[Optional[Dict[str, Any]]] = []
+        self._rows: Dict[str, int] = {}
+        self._free: List[int] = []
+        self._log = None
+        self._log_entries = 0
+        self._lock_file = None
+        # Identity and applied length of the sidecar, to notice other processes' changes
+        self._log_inode = 0
+        self._log_offset = 0
+
+    @property
+    def vectors_path(self) -> str:
+        return os.path.join(self.path, VECTORS_FILE)
+
+    @property
+    def metadata_path(self) -> str:
+        return os.path.join(self.path, METADATA_FILE)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @property
+    def lock_path(self) -> str:
+        return os.path.join(self.path, LOCK_FILE)
+
+    def open(self) -> None:
+        """Map the vector file and replay the metadata sidecar."""
+        with self._lock:
+            os.makedirs(self.path, exist_ok=True)
+            self._lock_file = open(self.lock_path, "a")
+            with self._exclusive():
+                if not os.path.exists(self.vectors_path):
+                    with open(self.vectors_path, "wb") as f:
+                        f.truncate(MIN_CAPACITY * self.dimension * 4)
+                self._load()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._ivf is not None:
+                self._ivf.close()
+                self._ivf = None
+            if self._vectors is not None:
+                self._vectors.flush()
+                self._vectors = None
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+            if self._lock_file is not None:
+                self._lock_file.close()
+                self._lock_file = None
+
+    @contextmanager
+    def _exclusive(self) -> Iterator[None]:
+        """Hold the lock that serializes changes to the index files across processes."""
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _load(self) -> None:
+        """(Re)build all in-memory state from the files; call with the file lock held."""
+        if self._log is not None:
+            self._log.close()
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._vectors = None
+        self._map()
+        self._replay()
+        self._quantize_all()
+        self._log = open(self.metadata_path, "a", encoding="utf-8")
+        if self.ann == "ivf":
+            if self._ivf is not None:
+                self._ivf.close()
+            ivf = IVFIndex(self.path, self.dimension, self.nlist)
+            ivf.open(self._capacity())
+            self._ivf = ivf
+            self._sync_ivf()
+
+    def _log_state(self) -> Tuple[int, int]:
+        try:
+            st = os.stat(self.metadata_path)
+        except FileNotFoundError:
+            return 0, 0
+        return st.st_ino, st.st_size
+
+    def _log_changed(self) -> bool:
+        return self._log_state() != (self._log_inode, self._log_offset)
+
+    def _refresh(self) -> None:
+        """Catch up with changes other processes made; call with the file lock held."""
+        inode, size = self._log_state()
+        if (inode, size) == (self._log_inode, self._log_offset):
+            return
+        if inode != self._log_inode or size < self._log_offset:
+            # Compacted (or first created) by another process; old offsets mean nothing now
+            self._load()
+            return
+        changed = self._apply_log()
+        self._free = [row for row in range(self._count) if not self._alive[row]]
+        live = [row for row in changed if self._alive[row]]
+        if self.quantization != "none":
+            for row in live:
+                self._store_codes(row, row + 1, np.asarray(self._vectors[row:row + 1]))
+        if self._ivf is not None:
+            # The other process updated the shared assignments; rebuild the lists from them
+            self._ivf.close()
+            self._ivf.open(self._capacity())
+            self._sync_ivf()
+
+    def _catch_up(self) -> None:
+        """Before a read: a cheap size check, and a locked refresh only if the sidecar changed."""
+        if self._log_changed():
+            with self._exclusive():
+                self._refresh()
+
+    def _capacity(self) -> int:
+        return 0 if self._vectors is None else self._vectors.shape[0]
+
+    def _map(self) -> None:
+        rows = os.path.getsize(self.vectors_path) // (self.dimension * 4)
+        self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(rows, self.dimension))
+        alive = np.zeros(rows, dtype=bool)
+        kept = min(rows, len(self._alive))
+        alive[:kept] = self._alive[:kept]
+        self._alive = alive
+        if self.quantization != "none":
+            dtype = np.float16 if self.quantization == "float16" else np.int8
+            codes = np.zeros((rows, self.dimension), dtype=dtype)
+            scales = np.ones(rows, dtype=np.float32)
+            if self._codes is not None:
+                kept = min(rows, len(self._codes))
+                codes[:kept] = self._codes[:kept]
+                if self._scales is not None:
+                    scales[:kept] = self._scales[:kept]
+            self._codes = codes
+            self._scales = scales if self.quantization == "int8" else None
+
+    def _quantize_all(self) -> None:
+        """Build the quantized matrix from the float32 file, a chunk at a time."""
+        if self.quantization == "none":
+            return
+        for start in range(0, self._count, SCORE_CHUNK_ROWS):
+            end = min(start + SCORE_CHUNK_ROWS, self._count)
+            self._store_codes(start, end, np.asarray(self._vectors[start:end]))
+
+    def _store_codes(self, start: int, end: int, rows: np.ndarray) -> None:
+        codes, scales = quantize(rows, self.quantization)
+        self._codes[start:end] = codes
+        if scales is not None:
+            self._scales[start:end] = scales
+
+    def memory_bytes(self) -> int:
+        """Bytes of the matrix that scoring reads for every query."""
+        if self.quantization == "none":
+            return self._count * self.dimension * 4
+        scale_bytes = self._count * 4 if self._scales is not None else 0
+        return self._count * self.dimension * self._codes.itemsize + scale_bytes
+
+    def _grow(self, needed: int) -> None:
+        # Another process may have grown the file already; never truncate below its size
+        file_rows = os.path.getsize(self.vectors_path) // (self.dimension * 4)
+        capacity = max(self._capacity(), file_rows, MIN_CAPACITY)
+        while capacity < needed:
+            capacity *= 2
+        self._vectors.flush()
+        self._vectors = None
+        if capacity > file_rows:
+            with open(self.vectors_path, "r+b") as f:
+                f.truncate(capacity * self.dimension * 4)
+        self._map()
+        if self._ivf is not None:
+            self._ivf.resize(capacity)
+
+    def _live_rows(self) -> np.ndarray:
+        return np.flatnonzero(self._alive[:self._count])
+
+    def _sync_ivf(self) -> None:
+        """Train the IVF index once there is enough data, and assign any rows it is missing."""
+        live = self._live_rows()
+        if not self._ivf.trained:
+            if len(live) < self._ivf.train_size:
+                return
+            rng = np.random.default_rng(0)
+            sample = np.sort(rng.choice(live, min(len(live), 2 * self._ivf.train_size), replace=False))
+            self._ivf.train(np.asarray(self._vectors[sample]))
+        missing = self._ivf.unassigned(live)
+        for start in range(0, len(missing), SCORE_CHUNK_ROWS):
+            rows = missing[start:start + SCORE_CHUNK_ROWS]
+            self._ivf.add(rows, np.asarray(self._vectors[rows]))
+        self._ivf.flush()
+
+    def _replay(self) -> None:
+        self._count = 0
+        self._ids, self._metadata, self._rows = [], [], {}
+        self._alive[:] = False
+        self._log_inode = 0
+        self._log_offset = 0
+        self._log_entries = 0
+        if os.path.exists(self.metadata_path):
+            self._apply_log()
+        self._free = [row for row in range(self._count) if not self._alive[row]]
+
+    def _apply_log(self) -> List[int]:
+        """Apply sidecar entries past the applied offset; returns the rows they touched."""
+        touched = []
+        with open(self.metadata_path, "rb") as f:
+            self._log_inode = os.fstat(f.fileno()).st_ino
+            f.seek(self._log_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # A torn or still-running write at the tail; picked up once complete
+                    break
+                self._log_offset += len(line)
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                self._log_entries += 1
+                if entry["op"] == "put":
+                    self._assign(entry["id"], entry["row"], entry.get("metadata") or {})
+                    touched.append(entry["row"])
+                elif entry["op"] == "del":
+                    row = self._release(entry["id"])
+                    if row is not None:
+                        touched.append(row)
+        return touched
+
+    def _compact_log(self) -> None:
+        """Rewrite the sidecar as one put per live row; call with the file lock held."""
+        tmp_path = self.metadata_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for entry_id, row in self._rows.items():
+                f.write(json.dumps({"op": "put", "id": entry_id, "row": row, "metadata": self._metadata[row]}) + "\n")
+        os.replace(tmp_path, self.metadata_path)
+        st = os.stat(self.metadata_path)
+        self._log_inode = st.st_ino
+        self._log_offset = st.st_size
+        self._log_entries = len(self._rows)
+
+    def _write_log(self, entries: List[Dict[str, Any]]) -> None:
+        self._log.write("".join(json.dumps(entry) + "\n" for entry in entries))
+        self._log.flush()
+        self._log_offset = self._log.tell()
+        self._log_entries += len(entries)
+
+    def _assign(self, entry_id: str, row: int, metadata: Dict[str, Any]) -> None:
+        if row >= self._capacity():
+            self._grow(row + 1)
+        while len(self._ids) <= row:
+            self._ids.append(None)
+            self._metadata.append(None)
+        self._count = max(self._count, row + 1)
+        self._ids[row] = entry_id
+        self._metadata[row] = metadata
+        self._rows[entry_id] = row
+        self._alive[row] = True
+
+    def _release(self, entry_id: str) -> Optional[int]:
+        row = self._rows.pop(entry_id, None)
+        if row is not None:
+            self._alive[row] = False
+            self._ids[row] = None
+            self._metadata[row] = None
+        return row
+
+    def upsert(self, items: List[Dict[str, Any]]) -> None:
+        with self._lock, self._exclusive():
+            self._refresh()
+            entries = []
+            written = []
+            for item in items:
+                row = self._rows.get(item["id"])
+                if row is None:
+                    row = self._free.pop() if self._free else self._count
+                metadata = item.get("metadata") or {}
+                self._assign(item["id"], row, metadata)
+                vector = _normalize(item["values"])
+                self._vectors[row] = vector
+                if self.quantization != "none":
+                    self._store_codes(row, row + 1, vector[None, :])
+                written.append(row)
+                entries.append({"op": "put", "id": item["id"], "row": row, "metadata": metadata})
+            self._vectors.flush()
+            self._write_log(entries)
+            if self._ivf is not None:
+                if self._ivf.trained:
+                    rows = np.unique(np.asarray(written, dtype=np.int64))
+                    self._ivf.add(rows, np.asarray(self._vectors[rows]))
+                    self._ivf.flush()
+                else:
+                    self._sync_ivf()
+            if self._log_entries > 2 * len(self._rows) + MIN_CAPACITY:
+                self._log.close()
+                self._compact_log()
+                self._log = open(self.metadata_path, "a", encoding="utf-8")
+
+    def delete(self, ids: List[str]) -> None:
+        with self._lock, self._exclusive():
+            self._refresh()
+            entries = []
+            released = []
+            for entry_id in ids:
+                row = self._release(entry_id)
+                if row is not None:
+                    self._free.append(row)
+                    released.append(row)
+                    entries.append({"op": "del", "id": entry_id})
+            if entries:
+                self._write_log(entries)
+            if self._ivf is not None and released:
+                self._ivf.remove(np.asarray(released, dtype=np.int64))
+                self._ivf.flush()
+
+    def items(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            self._catch_up()
+            return [{"id": entry_id, "metadata": self._metadata[row]} for entry_id, row in self._rows.items()]
+
+    def _scores(self, query: np.ndarray) -> np.ndarray:
+        n = self._count
+        if self.quantization == "none":
+            return np.asarray(self._vectors[:n] @ query)
+        # Score straight from the codes, upcasting one cache-sized chunk at a time
+        scores = np.empty(n, dtype=np.float32)
+        for start in range(0, n, SCORE_CHUNK_ROWS):
+            end = min(start + SCORE_CHUNK_ROWS, n)
+            scores[start:end] = self._codes[start:end].astype(np.float32) @ query
+        if self._scales is not None:
+            scores *= self._scales[:n]
+        return scores
+
+    def _score_rows(self, rows: np.ndarray, query: np.ndarray) -> np.ndarray:
+        if self.quantization == "none":
+            return np.asarray(self._vectors[rows] @ query)
+        scores = self._codes[rows].astype(np.float32) @ query
+        if self._scales is not None:
+            scores *= self._scales[rows]
+        return scores
+
+    def _candidates(self, query: np.ndarray, nprobe: Optional[int]):
+        """Live rows worth scoring, with their (possibly approximate) scores."""
+        if self._ivf is not None and self._ivf.trained:
+            rows = self._ivf.candidates(query, nprobe or self.nprobe)
+            rows = rows[self._alive[rows]]
+            return rows, self._score_rows(rows, query)
+        rows = self._live_rows()
+        return rows, self._scores(query)[rows]
+
+    @staticmethod
+    def _top(scores: np.ndarray, k: int) -> np.ndarray:
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top])]
+
+    def query(self, vector: List[float], top_k: int, nprobe: Optional[int] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            self._catch_up()
+            if not self._rows or top_k <= 0:
+                return []
+            query = _normalize(vector)
+            rows, scores = self._candidates(query, nprobe)
+            if len(rows) == 0:
+                return []
+            k = min(top_k, len(rows))
+
+            if self.quantization != "none" and self.rerank_factor > 0:
+                # Re-score the best approximate candidates against the exact vectors
+                rows = np.sort(rows[self._top(scores, min(k * self.rerank_factor, len(rows)))])
+                scores = np.asarray(self._vectors[rows] @ query)
+
+            top = self._top(scores, k)
+            return [
+                {"id": self._ids[row], "score": float(scores[i]), "metadata": self._metadata[row]}
+                for i, row in zip(top, rows[top].tolist())
+            ]
+
+
+class LocalVectorStore(VectorStore):
+    """
+    In-process vector store backed by memory-mapped NumPy indexes.
+
+    Each namespace is its own LocalFaqIndex in a subdirectory, so a search
+    only scans that tenant's vectors. The default namespace lives at the root
+    path. Namespace indexes are opened on first use, and once more than
+    max_open are open the least recently used idle ones are closed.
+    """
+
+    def __init__(self, path: Optional[str] = None, dimension: Optional[int] = None, max_open: Optional[int] = None):
+        self.path = path or settings.LOCAL_VECTOR_PATH
+        self.dimension = dimension or settings.EMBEDDING_DIMENSION
+        self.max_open = max_open or settings.LOCAL_VECTOR_MAX_OPEN
+        self.quantization = settings.LOCAL_VECTOR_QUANTIZATION
+        self.rerank_factor = settings.LOCAL_VECTOR_RERANK_FACTOR
+        self.ann = settings.LOCAL_VECTOR_ANN
+        self.nlist = settings.LOCAL_VECTOR_IVF_NLIST
+        self.nprobe = settings.LOCAL_VECTOR_IVF_NPROBE
+        self.indexes: "OrderedDict[str, LocalFaqIndex]" = OrderedDict()
+        self._in_use: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def connect(self) -> None:
+        os.makedirs(self.path, exist_ok=True)
+
+    def close(self) -> None:
+        with self._lock:
+            for index in self.indexes.values():
+                index.close()
+            self.indexes = OrderedDict()
+
+    def namespace_path(self, namespace: str) -> str:
+        if not namespace:
+            return self.path
+        if not NAMESPACE_PATTERN.match(namespace):
+            raise ValueError(f"Invalid namespace: {namespace}")
+        return os.path.join(self.path, NAMESPACES_DIR, namespace)
+
+    @contextmanager
+    def _index(self, namespace: str, create: bool) -> Iterator[Optional[LocalFaqIndex]]:
+        """
+        Use the namespace's index, opening it if needed; None if it does not
+        exist and create is False. The index is not closed while in use.
+        """
+        with self._lock:
+            index = self.indexes.get(namespace)
+            if index is None:
+                path = self.namespace_path(namespace)
+                if create or os.path.exists(os.path.join(path, VECTORS_FILE)):
+                    index = LocalFaqIndex(
+                        path,
+                        self.dimension,
+                        quantization=self.quantization,
+                        rerank_factor=self.rerank_factor,
+                        ann=self.ann,
+                        nlist=self.nlist,
+                        nprobe=self.nprobe,
+                    )
+                    index.open()
+                    self.indexes[namespace] = index
+            if index is not None:
+                self.indexes.move_to_end(namespace)
+                self._in_use[namespace] = self._in_use.get(namespace, 0) + 1
+        if index is None:
+            yield None
+            return
+        try:
+            yield index
+        finally:
+            with self._lock:
+                self._in_use[namespace] -= 1
+                if not self._in_use[namespace]:
+                    del self._in_use[namespace]
+                self._evict_idle()
+
+    def _evict_idle(self) -> None:
+        """Close least recently used indexes that nobody is using until at most max_open are open."""
+        for namespace in list(self.indexes):
+            if len(self.indexes) <= self.max_open:
+                return
+            if namespace not in self._in_use:
+                self.indexes.pop(namespace).close()
+
+    def query(self, vector: List[float], top_k: int, namespace: str = "") -> List[Dict[str, Any]]:
+        with self._index(namespace, create=False) as index:
+            return index.query(vector, top_k) if index is not None else []
+
+    def upsert(self, items: List[Dict[str, Any]], namespace: str = "") -> None:
+        with self._index(namespace, create=True) as index:
+            index.upsert(items)
+
+    def delete(self, ids: List[str], namespace: str = "") -> None:
+        with self._index(namespace, create=False) as index:
+            if index is not None:
+                index.delete(ids)
+
+    def iter_items(self, namespace: str = "") -> Iterator[Dict[str, Any]]:
+        with self._index(namespace, create=False) as index:
+            return iter(index.items() if index is not None else ())
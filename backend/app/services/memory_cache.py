@@ -0,0 +1,110 @@
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional
+
+from app.core.config import settings
+
+
+class _UserMemories:
+    """The newest memories of one user, oldest first."""
+
+    def __init__(self, depth: int, expires_at: float, complete: bool):
+        self.memories: Deque[Dict[str, Any]] = deque(maxlen=depth)
+        self.expires_at = expires_at
+        # True when the user has no memories older than the ones held here
+        self.complete = complete
+
+
+class MemoryCache:
+    """
+    Hot tier of each active user's most recent memories.
+
+    Every user gets a ring buffer of the last depth memories, filled from the
+    graph database on a miss and kept current by store_memory writing through.
+    A request for limit memories is answered here when the buffer holds at
+    least limit of them, or all the user has. Entries expire after a TTL so
+    memories written by other workers show up eventually, and the number of
+    users is an LRU bounded to max_users.
+    """
+
+    def __init__(self, depth: int = 20, max_users: int = 10000, ttl: float = 300.0):
+        self.depth = depth
+        self.max_users = max_users
+        self.ttl = ttl
+        self._users: "OrderedDict[Any, _UserMemories]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _entry(self, user_id: Any) -> Optional[_UserMemories]:
+        entry = self._users.get(user_id)
+        if entry is not None and entry.expires_at <= time.monotonic():
+            del self._users[user_id]
+            entry = None
+        if entry is not None:
+            self._users.move_to_end(user_id)
+        return entry
+
+    def _insert(self, user_id: Any, complete: bool) -> _UserMemories:
+        entry = self._users[user_id] = _UserMemories(self.depth, time.monotonic() + self.ttl, complete)
+        self._users.move_to_end(user_id)
+        while len(self._users) > self.max_users:
+            self._users.popitem(last=False)
+        return entry
+
+    def get(self, user_id: Any, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """Newest-first memories for user_id, or None if the hot tier cannot answer."""
+        entry = self._entry(user_id)
+        if entry is None or (len(entry.memories) < limit and not entry.complete):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return list(reversed(entry.memories))[:limit]
+
+    def fill(self, user_id: Any, memories: List[Dict[str, Any]]) -> None:
+        """
+        Cache newest-first memories read from the database with a limit of depth.
+        Memories written through while the read was running are kept.
+        """
+        complete = len(memories) < self.depth
+        entry = self._entry(user_id)
+        if entry is not None:
+            seen = {memory["id"] for memory in memories}
+            memories = sorted(
+                memories + [memory for memory in entry.memories if memory["id"] not in seen],
+                key=lambda memory: (memory["timestamp"], memory["id"]),
+                reverse=True,
+            )
+        entry = self._insert(user_id, complete)
+        entry.memories.extend(reversed(memories[:self.depth]))
+
+    def add(self, user_id: Any, memory: Dict[str, Any]) -> None:
+        """Write-through for a newly stored memory."""
+        entry = self._entry(user_id)
+        if entry is None:
+            # Nothing known about older memories; only serves requests for the latest one
+            entry = self._insert(user_id, complete=False)
+        entry.memories.append(memory)
+
+    def invalidate(self, user_id: Any = None) -> None:
+        if user_id is None:
+            self._users.clear()
+        else:
+            self._users.pop(user_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "users": len(self._users),
+            "memories": sum(len(entry.memories) for entry in self._users.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+# Initialize memory hot tier
+memory_cache = MemoryCache(
+    depth=settings.MEMORY_CACHE_DEPTH,
+    max_users=settings.MEMORY_CACHE_USERS,
+    ttl=settings.MEMORY_CACHE_TTL,
+)
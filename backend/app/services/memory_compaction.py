@@ -0,0 +1,93 @@
+import time
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.services.memory_store import memory_store_client
+from app.services.memory_cache import memory_cache
+
+
+class MemoryCompactor:
+    """
+    Retention job for stored memories.
+
+    Memories older than retention_days are rolled up into one summary per
+    user and day (count, data bytes, types and time range) and then
+    deleted, batch_size at a time. Runs every interval seconds in the
+    background once started, or on demand through run_once().
+    """
+
+    def __init__(self, retention_days: float = 90, batch_size: int = 500, interval: float = 3600):
+        self.retention_days = retention_days
+        self.batch_size = batch_size
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self.runs = 0
+        self.nodes_reclaimed = 0
+        self.bytes_reclaimed = 0
+        self.last_run: Optional[Dict[str, Any]] = None
+
+    def start(self) -> None:
+        if self.interval > 0 and (self._task is None or self._task.done()):
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except Exception as e:
+                print(f"Error compacting memories: {e}")
+
+    async def run_once(self, max_batches: Optional[int] = None) -> Dict[str, Any]:
+        """Compact every expired memory, or at most max_batches batches of them."""
+        started = time.perf_counter()
+        cutoff = datetime.now(timezone.utc) - timedelta(days=self.retention_days)
+        report = {"cutoff": cutoff.isoformat(timespec="microseconds"), "batches": 0, "nodes": 0, "bytes": 0}
+        store = await memory_store_client.get()
+        while max_batches is None or report["batches"] < max_batches:
+            reclaimed = await store.compact(report["cutoff"], self.batch_size)
+            if not reclaimed["nodes"]:
+                break
+            report["batches"] += 1
+            report["nodes"] += reclaimed["nodes"]
+            report["bytes"] += reclaimed["bytes"]
+            # Let chat queries in between batches
+            await asyncio.sleep(0)
+
+        if report["nodes"]:
+            # Cached recent memories may include the ones just deleted
+            memory_cache.invalidate()
+        report["seconds"] = time.perf_counter() - started
+        self.runs += 1
+        self.nodes_reclaimed += report["nodes"]
+        self.bytes_reclaimed += report["bytes"]
+        self.last_run = report
+        return report
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "retention_days": self.retention_days,
+            "runs": self.runs,
+            "nodes_reclaimed": self.nodes_reclaimed,
+            "bytes_reclaimed": self.bytes_reclaimed,
+            "last_run": self.last_run,
+        }
+
+
+# Initialize memory retention job
+memory_compactor = MemoryCompactor(
+    retention_days=settings.MEMORY_RETENTION_DAYS,
+    batch_size=settings.MEMORY_COMPACTION_BATCH_SIZE,
+    interval=settings.MEMORY_COMPACTION_INTERVAL,
+)
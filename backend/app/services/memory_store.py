@@ -0,0 +1,127 @@
+import asyncio
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+
+class MemoryBackend:
+    """
+    Interface for the conversation memory stores used by graph_service.
+
+    Memories are plain dicts with ``id``, ``type``, ``data`` (a JSON string)
+    and ``timestamp`` (an ISO 8601 UTC string); events passed to write()
+    carry ``user_id`` as well. Every backend returns the same shapes, so
+    callers never see driver types.
+    """
+
+    async def connect(self) -> None:
+        """Open connections; backends that cannot connect should degrade, not raise."""
+        pass
+
+    async def close(self) -> None:
+        """Release any resources held by the store."""
+        pass
+
+    @property
+    def available(self) -> bool:
+        """False while the backend is degraded; writes raise until it recovers."""
+        return True
+
+    async def write(self, events: List[Dict[str, Any]]) -> None:
+        """Insert a batch of memory events."""
+        raise NotImplementedError
+
+    async def recent(self, user_id: int, limit: int, before: Optional[Tuple[str, str]] = None) -> List[Dict[str, Any]]:
+        """
+        Return the user's newest memories, newest first by (timestamp, id).
+        With before, a (timestamp, id) key, only memories that sort after it are returned.
+        """
+        raise NotImplementedError
+
+    async def stream(self, user_id: int, page_size: int = 500) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield all of the user's memories, newest first.
+        The default pages through recent(); backends with a streaming driver override it.
+        """
+        before = None
+        while True:
+            page = await self.recent(user_id, page_size, before)
+            for memory in page:
+                yield memory
+            if len(page) < page_size:
+                return
+            before = (page[-1]["timestamp"], page[-1]["id"])
+
+    async def compact(self, cutoff: str, batch_size: int) -> Dict[str, int]:
+        """
+        Roll up at most batch_size memories older than cutoff into per-user
+        daily summaries and delete them. Returns the nodes and data bytes removed.
+        """
+        return {"nodes": 0, "bytes": 0}
+
+
+def _neo4j_memory_backend() -> MemoryBackend:
+    # Imported lazily because graph_service builds on this module
+    from app.services.graph_service import Neo4jMemoryBackend
+    return Neo4jMemoryBackend()
+
+
+def _sqlite_memory_backend() -> MemoryBackend:
+    from app.services.sqlite_memory_store import SQLiteMemoryBackend
+    return SQLiteMemoryBackend(settings.MEMORY_SQLITE_PATH)
+
+
+# Registered backends, keyed by the MEMORY_BACKEND setting
+_backends: Dict[str, Callable[[], MemoryBackend]] = {
+    "neo4j": _neo4j_memory_backend,
+    "sqlite": _sqlite_memory_backend,
+}
+
+def register_memory_backend(name: str, factory: Callable[[], MemoryBackend]) -> None:
+    """Register a memory backend so it can be selected with MEMORY_BACKEND."""
+    _backends[name] = factory
+
+def create_memory_backend(name: str) -> MemoryBackend:
+    """Build an unconnected memory backend for a registered name."""
+    if name not in _backends:
+        raise ValueError(f"Unknown memory backend: {name}")
+    return _backends[name]()
+
+
+class MemoryStoreClient:
+    """
+    Process-wide holder for the configured memory backend.
+
+    The backend is created and connected once, on first use or at startup,
+    and the same handle is reused by every request afterwards.
+    """
+
+    def __init__(self, backend: Optional[str] = None):
+        self.backend = backend
+        self._store: Optional[MemoryBackend] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def name(self) -> str:
+        return self.backend or settings.MEMORY_BACKEND
+
+    async def get(self) -> MemoryBackend:
+        """Return the connected backend, connecting it on first use."""
+        if self._store is None:
+            async with self._lock:
+                if self._store is None:
+                    store = create_memory_backend(self.name)
+                    await store.connect()
+                    self._store = store
+        return self._store
+
+    async def close(self) -> None:
+        """Close the backend; the next get() reconnects."""
+        async with self._lock:
+            if self._store is not None:
+                await self._store.close()
+                self._store = None
+
+
+# Initialize memory store client
+memory_store_client = MemoryStoreClient()
@@ -0,0 +1,160 @@
+import time
+import asyncio
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple, Type
+
+OVERFLOW_POLICIES = ("drop_oldest", "drop_newest", "block")
+
+
+class MemoryWriter:
+    """
+    Write-behind queue for memory events.
+
+    put() only appends to an in-process queue; a background task hands the
+    queued events to write_batch in batches of up to batch_size, whenever a
+    full batch is waiting or flush_interval seconds have passed. The queue is
+    bounded: when full, the oldest event is dropped ("drop_oldest"), the new
+    one is refused ("drop_newest"), or put() waits for room ("block").
+    A batch that fails with one of the retry_on errors (the backend was
+    unreachable or timed out) is retried up to max_attempts times in all,
+    waiting flush_interval, then twice that, and so on between attempts.
+    Any other error, or running out of attempts, logs and drops the batch,
+    so one bad batch cannot hold up the queue behind it. stop() drains
+    whatever is still queued, trying each batch once.
+    """
+
+    def __init__(
+        self,
+        write_batch: Callable[[List[Dict[str, Any]]], Awaitable[Any]],
+        max_queue: int = 10000,
+        batch_size: int = 200,
+        flush_interval: float = 0.5,
+        overflow: str = "drop_oldest",
+        max_attempts: int = 3,
+        retry_on: Tuple[Type[BaseException], ...] = (ConnectionError, TimeoutError),
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        self.write_batch = write_batch
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.max_attempts = max(1, max_attempts)
+        self.retry_on = retry_on
+        self._queue: Deque[Dict[str, Any]] = deque()
+        # The batch being written; still pending for readers until it is done
+        self._writing: List[Dict[str, Any]] = []
+        self._wakeup = asyncio.Event()
+        self._space = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self.retried = 0
+        self.batches = 0
+        self.batch_seconds_total = 0.0
+        self.batch_seconds_max = 0.0
+        self.last_batch_seconds = 0.0
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._stopping = False
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Flush everything still queued and stop the background task."""
+        self._stopping = True
+        self._wakeup.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+        elif self._queue:
+            await self._drain()
+
+    async def put(self, event: Dict[str, Any]) -> bool:
+        """Queue an event for writing; returns False if it was dropped."""
+        self.start()
+        while len(self._queue) >= self.max_queue:
+            if self.overflow == "drop_newest":
+                self.dropped += 1
+                return False
+            if self.overflow == "drop_oldest":
+                self._queue.popleft()
+                self.dropped += 1
+                break
+            self._space.clear()
+            await self._space.wait()
+        self._queue.append(event)
+        self.enqueued += 1
+        if len(self._queue) >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def pending(self, predicate: Callable[[Dict[str, Any]], bool]) -> List[Dict[str, Any]]:
+        """Queued events matching predicate, oldest first."""
+        return [event for event in self._writing if predicate(event)] + [event for event in self._queue if predicate(event)]
+
+    async def _run(self) -> None:
+        while True:
+            if len(self._queue) < self.batch_size and not self._stopping:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            self._wakeup.clear()
+            await self._drain()
+            if self._stopping and not self._queue:
+                return
+
+    async def _drain(self) -> None:
+        while self._queue:
+            batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+            self._space.set()
+            self._writing = batch
+            try:
+                await self._write(batch)
+            finally:
+                self._writing = []
+
+    async def _write(self, batch: List[Dict[str, Any]]) -> None:
+        attempt = 1
+        while True:
+            started = time.perf_counter()
+            try:
+                await self.write_batch(batch)
+                self.written += len(batch)
+                return
+            except Exception as e:
+                retry = isinstance(e, self.retry_on) and attempt < self.max_attempts and not self._stopping
+                print(f"Error writing memory batch of {len(batch)} (attempt {attempt}): {e}")
+                if not retry:
+                    self.failed += len(batch)
+                    print(f"Dropped memory batch of {len(batch)}")
+                    return
+            finally:
+                elapsed = time.perf_counter() - started
+                self.batches += 1
+                self.last_batch_seconds = elapsed
+                self.batch_seconds_total += elapsed
+                self.batch_seconds_max = max(self.batch_seconds_max, elapsed)
+            self.retried += len(batch)
+            await asyncio.sleep(self.flush_interval * 2 ** (attempt - 1))
+            attempt += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": len(self._queue),
+            "max_queue": self.max_queue,
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "written": self.written,
+            "failed": self.failed,
+            "retried": self.retried,
+            "batches": self.batches,
+            "last_batch_ms": round(self.last_batch_seconds * 1000, 3),
+            "avg_batch_ms": round(self.batch_seconds_total / self.batches * 1000, 3) if self.batches else 0.0,
+            "max_batch_ms": round(self.batch_seconds_max * 1000, 3),
+        }
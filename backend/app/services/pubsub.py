@@ -0,0 +1,138 @@
+import asyncio
+from typing import Callable, Dict, Optional
+
+from app.core.config import settings
+
+MessageCallback = Callable[[str], None]
+
+
+class PubSubBroker:
+    """
+    Interface for the message brokers behind the chat connection manager.
+
+    A process subscribes to a channel with one callback and receives every
+    message published to it, by any process sharing the broker. Messages are
+    strings and delivery is at most once.
+    """
+
+    async def connect(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    async def publish(self, channel: str, message: str) -> None:
+        raise NotImplementedError
+
+    async def subscribe(self, channel: str, callback: MessageCallback) -> None:
+        """Call callback with every message on channel, replacing any earlier callback."""
+        raise NotImplementedError
+
+    async def unsubscribe(self, channel: str) -> None:
+        raise NotImplementedError
+
+
+class InMemoryBroker(PubSubBroker):
+    """Single-process broker; publishers and subscribers must share the event loop."""
+
+    def __init__(self):
+        self._callbacks: Dict[str, MessageCallback] = {}
+
+    async def publish(self, channel: str, message: str) -> None:
+        callback = self._callbacks.get(channel)
+        if callback is not None:
+            callback(message)
+
+    async def subscribe(self, channel: str, callback: MessageCallback) -> None:
+        self._callbacks[channel] = callback
+
+    async def unsubscribe(self, channel: str) -> None:
+        self._callbacks.pop(channel, None)
+
+
+class RedisBroker(PubSubBroker):
+    """
+    Broker over Redis PUBLISH/SUBSCRIBE, shared by every worker and node using the same server.
+
+    One connection per process carries all subscriptions and a background
+    task dispatches incoming messages to their callbacks.
+    """
+
+    def __init__(self, url: str):
+        self.url = url
+        self._redis = None
+        self._pubsub = None
+        self._listener: Optional[asyncio.Task] = None
+        self._callbacks: Dict[str, MessageCallback] = {}
+
+    async def connect(self) -> None:
+        if self._redis is not None:
+            return
+        # Imported lazily so single-process deployments do not need a Redis client
+        import redis.asyncio as redis
+        self._redis = redis.from_url(self.url, decode_responses=True)
+        self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        self._listener = asyncio.get_running_loop().create_task(self._listen())
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+        self._callbacks.clear()
+
+    async def publish(self, channel: str, message: str) -> None:
+        await self._redis.publish(channel, message)
+
+    async def subscribe(self, channel: str, callback: MessageCallback) -> None:
+        self._callbacks[channel] = callback
+        await self._pubsub.subscribe(channel)
+
+    async def unsubscribe(self, channel: str) -> None:
+        self._callbacks.pop(channel, None)
+        await self._pubsub.unsubscribe(channel)
+
+    async def _listen(self) -> None:
+        while True:
+            if not self._pubsub.subscribed:
+                await asyncio.sleep(0.1)
+                continue
+            try:
+                message = await self._pubsub.get_message(timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # The client reconnects and resubscribes on the next read
+                print(f"Error reading from Redis pub/sub: {e}")
+                await asyncio.sleep(1.0)
+                continue
+            if message and message["type"] == "message":
+                callback = self._callbacks.get(message["channel"])
+                if callback is not None:
+                    callback(message["data"])
+
+
+# Registered brokers, keyed by the PUBSUB_BACKEND setting
+_brokers: Dict[str, Callable[[], PubSubBroker]] = {
+    "memory": InMemoryBroker,
+    "redis": lambda: RedisBroker(settings.REDIS_URL),
+}
+
+def register_broker(name: str, factory: Callable[[], PubSubBroker]) -> None:
+    """Register a broker so it can be selected with PUBSUB_BACKEND."""
+    _brokers[name] = factory
+
+def create_broker(name: str) -> PubSubBroker:
+    """Build an unconnected broker for a registered name."""
+    if name not in _brokers:
+        raise ValueError(f"Unknown pub/sub backend: {name}")
+    return _brokers[name]()
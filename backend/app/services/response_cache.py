@@ -0,0 +1,158 @@
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.embedding_cache import normalize_text
+
+
+def prompt_version(custom_prompt: Optional[str]) -> str:
+    """Fingerprint of a store's custom prompt; cached responses are only valid for one version."""
+    return hashlib.sha256((custom_prompt or "").encode("utf-8")).hexdigest()[:16]
+
+
+class _StoreResponses:
+    """Cached responses for one store, most recently used last."""
+
+    def __init__(self, version: str):
+        self.version = version
+        self.entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._matrix: Optional[np.ndarray] = None
+        self._keys: List[str] = []
+
+    def matrix(self) -> np.ndarray:
+        if self._matrix is None:
+            self._keys = list(self.entries)
+            self._matrix = np.stack([self.entries[key]["vector"] for key in self._keys])
+        return self._matrix
+
+    def changed(self) -> None:
+        self._matrix = None
+
+
+class ResponseCache:
+    """
+    Per-store semantic cache of generated chat responses.
+
+    A lookup embeds nothing itself: it compares the query embedding against
+    the store's cached query embeddings and returns the best response above
+    the similarity threshold. Entries expire after a TTL and each store is an
+    LRU bounded to max_entries; the number of stores is bounded as well.
+    """
+
+    def __init__(self, max_entries: int = 256, max_stores: int = 1024, ttl: float = 300.0, threshold: float = 0.95):
+        self.max_entries = max_entries
+        self.max_stores = max_stores
+        self.ttl = ttl
+        self.threshold = threshold
+        self._stores: "OrderedDict[Any, _StoreResponses]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _unit(embedding: List[float]) -> Optional[np.ndarray]:
+        v = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(v))
+        return v / norm if norm > 0 else None
+
+    def _store(self, store_id: Any, version: str, create: bool) -> Optional[_StoreResponses]:
+        store = self._stores.get(store_id)
+        if store is not None and store.version != version:
+            # The store's prompt changed since these responses were generated
+            del self._stores[store_id]
+            self.invalidations += 1
+            store = None
+        if store is None and create:
+            store = self._stores[store_id] = _StoreResponses(version)
+            while len(self._stores) > self.max_stores:
+                self._stores.popitem(last=False)
+        if store is not None:
+            self._stores.move_to_end(store_id)
+        return store
+
+    def lookup(self, store_id: Any, embedding: List[float], version: str = "") -> Optional[str]:
+        """Return a cached response for a sufficiently similar query, if any."""
+        vector = self._unit(embedding)
+        with self._lock:
+            store = self._store(store_id, version, create=False)
+            if vector is None or store is None or not store.entries:
+                self.misses += 1
+                return None
+
+            now = time.monotonic()
+            expired = [key for key, entry in store.entries.items() if entry["expires_at"] <= now]
+            for key in expired:
+                del store.entries[key]
+            if expired:
+                store.changed()
+            if not store.entries:
+                self.misses += 1
+                return None
+
+            scores = store.matrix() @ vector
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                self.misses += 1
+                return None
+
+            key = store._keys[best]
+            store.entries.move_to_end(key)
+            self.hits += 1
+            return store.entries[key]["response"]
+
+    def put(self, store_id: Any, query: str, embedding: List[float], response: str, version: str = "") -> None:
+        vector = self._unit(embedding)
+        if vector is None:
+            return
+        with self._lock:
+            store = self._store(store_id, version, create=True)
+            key = normalize_text(query)
+            store.entries[key] = {
+                "vector": vector,
+                "response": response,
+                "expires_at": time.monotonic() + self.ttl,
+            }
+            store.entries.move_to_end(key)
+            while len(store.entries) > self.max_entries:
+                store.entries.popitem(last=False)
+            store.changed()
+
+    def invalidate(self, store_id: Any = None) -> None:
+        """
+        Drop cached responses for one store, or for every store.
+        Partitioned stores keyed as (store_id, partition) tuples are dropped with their store.
+        """
+        with self._lock:
+            if store_id is None:
+                self._stores.clear()
+            else:
+                for key in list(self._stores):
+                    if key == store_id or (isinstance(key, tuple) and key[0] == store_id):
+                        del self._stores[key]
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "stores": len(self._stores),
+            "entries": sum(len(store.entries) for store in self._stores.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+# Initialize response cache
+response_cache = ResponseCache(
+    max_entries=settings.RESPONSE_CACHE_SIZE,
+    max_stores=settings.RESPONSE_CACHE_MAX_STORES,
+    ttl=settings.RESPONSE_CACHE_TTL,
+    threshold=settings.RESPONSE_CACHE_THRESHOLD,
+)
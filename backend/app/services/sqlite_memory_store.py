@@ -0,0 +1,138 @@
+import os
+import json
+import sqlite3
+import asyncio
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services.memory_store import MemoryBackend
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS memories (
+    id TEXT PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    data TEXT NOT NULL,
+    timestamp TEXT NOT NULL
+);
+DROP INDEX IF EXISTS memories_user_timestamp;
+CREATE INDEX IF NOT EXISTS memories_user_timestamp_id ON memories (user_id, timestamp, id);
+CREATE INDEX IF NOT EXISTS memories_timestamp ON memories (timestamp);
+CREATE TABLE IF NOT EXISTS memory_summaries (
+    user_id INTEGER NOT NULL,
+    day TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    bytes INTEGER NOT NULL,
+    types TEXT NOT NULL,
+    first TEXT NOT NULL,
+    last TEXT NOT NULL,
+    PRIMARY KEY (user_id, day)
+);
+"""
+
+
+class SQLiteMemoryBackend(MemoryBackend):
+    """
+    Conversation memories in an embedded SQLite file.
+
+    For deployments that do not run Neo4j. The database uses WAL so reads
+    are not blocked by the batched writes, and an index on (user_id,
+    timestamp, id) serves recent-memory pages without a sort. Calls run in
+    worker threads over one shared connection.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    async def connect(self) -> None:
+        if self._db is None:
+            await asyncio.to_thread(self._open)
+
+    def _open(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        db = sqlite3.connect(self.path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.executescript(SCHEMA)
+        self._db = db
+
+    async def close(self) -> None:
+        if self._db is not None:
+            with self._lock:
+                self._db.close()
+                self._db = None
+
+    async def write(self, events: List[Dict[str, Any]]) -> None:
+        await asyncio.to_thread(self._write, events)
+
+    def _write(self, events: List[Dict[str, Any]]) -> None:
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR IGNORE INTO memories (id, user_id, type, data, timestamp) VALUES (?, ?, ?, ?, ?)",
+                [(e["id"], e["user_id"], e["type"], e["data"], e["timestamp"]) for e in events],
+            )
+
+    async def recent(self, user_id: int, limit: int, before: Optional[Tuple[str, str]] = None) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self._recent, user_id, limit, before)
+
+    def _recent(self, user_id: int, limit: int, before: Optional[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        # Keyset condition on the (user_id, timestamp) index; cost does not grow with the page number
+        where, parameters = "user_id = ?", [user_id]
+        if before is not None:
+            where += " AND (timestamp, id) < (?, ?)"
+            parameters.extend(before)
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT id, type, data, timestamp FROM memories WHERE {where} "
+                "ORDER BY timestamp DESC, id DESC LIMIT ?",
+                (*parameters, limit),
+            ).fetchall()
+        return [{"id": row[0], "type": row[1], "data": row[2], "timestamp": row[3]} for row in rows]
+
+    async def compact(self, cutoff: str, batch_size: int) -> Dict[str, int]:
+        return await asyncio.to_thread(self._compact, cutoff, batch_size)
+
+    def _compact(self, cutoff: str, batch_size: int) -> Dict[str, int]:
+        with self._lock, self._db:
+            rows = self._db.execute(
+                "SELECT rowid, user_id, type, length(data), timestamp FROM memories "
+                "WHERE timestamp < ? ORDER BY timestamp LIMIT ?",
+                (cutoff, batch_size),
+            ).fetchall()
+
+            groups: Dict[tuple, Dict[str, Any]] = {}
+            for _, user_id, kind, size, timestamp in rows:
+                group = groups.setdefault((user_id, timestamp[:10]), {
+                    "count": 0, "bytes": 0, "types": [], "first": timestamp, "last": timestamp,
+                })
+                group["count"] += 1
+                group["bytes"] += size
+                if kind not in group["types"]:
+                    group["types"].append(kind)
+                group["first"] = min(group["first"], timestamp)
+                group["last"] = max(group["last"], timestamp)
+
+            for (user_id, day), group in groups.items():
+                existing = self._db.execute(
+                    "SELECT count, bytes, types, first, last FROM memory_summaries WHERE user_id = ? AND day = ?",
+                    (user_id, day),
+                ).fetchone()
+                if existing:
+                    group["count"] += existing[0]
+                    group["bytes"] += existing[1]
+                    types = json.loads(existing[2])
+                    group["types"] = types + [kind for kind in group["types"] if kind not in types]
+                    group["first"] = min(group["first"], existing[3])
+                    group["last"] = max(group["last"], existing[4])
+                self._db.execute(
+                    "INSERT OR REPLACE INTO memory_summaries (user_id, day, count, bytes, types, first, last) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (user_id, day, group["count"], group["bytes"], json.dumps(group["types"]), group["first"], group["last"]),
+                )
+
+            self._db.executemany("DELETE FROM memories WHERE rowid = ?", [(row[0],) for row in rows])
+        return {"nodes": len(rows), "bytes": sum(row[3] for row in rows)}
@@ -0,0 +1,116 @@
+import time
+import asyncio
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Awaitable, Deque, Dict, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class StageStats:
+    """Outcome counts and latency percentiles over the last window runs of one stage."""
+
+    def __init__(self, window: int = 1000):
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.count = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.cancelled = 0
+
+    def record(self, elapsed_ms: float, outcome: str = "ok") -> None:
+        self.samples.append(elapsed_ms)
+        self.count += 1
+        if outcome == "timeout":
+            self.timeouts += 1
+        elif outcome == "error":
+            self.errors += 1
+        elif outcome == "cancelled":
+            self.cancelled += 1
+
+    def _percentile(self, ordered: list, q: float) -> float:
+        return ordered[int(q * (len(ordered) - 1))] if ordered else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        ordered = sorted(self.samples)
+        return {
+            "count": self.count,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "cancelled": self.cancelled,
+            "avg_ms": sum(ordered) / len(ordered) if ordered else 0.0,
+            "p50_ms": self._percentile(ordered, 0.5),
+            "p99_ms": self._percentile(ordered, 0.99),
+            "max_ms": ordered[-1] if ordered else 0.0,
+        }
+
+
+class StageTimer:
+    """
+    Runs the stages of a request pipeline under per-stage deadlines and records how long each took.
+
+    A stage that times out or fails returns its default instead of raising,
+    so optional stages degrade rather than fail the request. Each call also
+    adds the stage's duration to the caller's timings dict, which can be
+    rendered as a Server-Timing header.
+    """
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self._stages: Dict[str, StageStats] = {}
+
+    def _stage(self, name: str) -> StageStats:
+        stage = self._stages.get(name)
+        if stage is None:
+            stage = self._stages[name] = StageStats(self.window)
+        return stage
+
+    def record(self, name: str, elapsed_ms: float, outcome: str = "ok", timings: Optional[Dict[str, float]] = None) -> None:
+        self._stage(name).record(elapsed_ms, outcome)
+        if timings is not None:
+            timings[name] = elapsed_ms
+
+    @contextmanager
+    def measure(self, name: str, timings: Optional[Dict[str, float]] = None) -> Iterator[None]:
+        """Time a synchronous stage; exceptions propagate."""
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            yield
+            outcome = "ok"
+        finally:
+            self.record(name, (time.perf_counter() - started) * 1000, outcome, timings)
+
+    async def run(
+        self,
+        name: str,
+        awaitable: Awaitable[T],
+        timeout: Optional[float],
+        timings: Optional[Dict[str, float]] = None,
+        default: Any = None,
+    ) -> T:
+        """Await a stage for at most timeout seconds, returning default if it times out or fails."""
+        started = time.perf_counter()
+        outcome = "ok"
+        try:
+            return await asyncio.wait_for(awaitable, timeout=timeout)
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            print(f"Stage {name} exceeded its {timeout}s deadline")
+            return default
+        except Exception as e:
+            outcome = "error"
+            print(f"Error in stage {name}: {e}")
+            return default
+        finally:
+            self.record(name, (time.perf_counter() - started) * 1000, outcome, timings)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: stage.stats() for name, stage in self._stages.items()}
+
+
+def server_timing(timings: Dict[str, float]) -> str:
+    """Render stage durations as a Server-Timing header value."""
+    return ", ".join(f"{name};dur={elapsed_ms:.1f}" for name, elapsed_ms in timings.items())
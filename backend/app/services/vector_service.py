@@ -1,65 +1,175 @@
 import os
+import asyncio
+import hashlib
 from typing import List, Dict, Any, Optional
-import pinecone
 from app.core.config import settings
+from app.services.vector_store import VectorStore, vector_store_client
+from app.services.embedding_cache import embedding_cache, normalize_text
+from app.services.faq_exact_index import faq_exact_index
+from app.services.response_cache import response_cache
+from app.services.singleflight import SingleFlight
+from app.services.embedding_batcher import EmbeddingBatcher
 
-# Initialize Pinecone
-def init_pinecone():
-    """Initialize Pinecone client."""
-    if not settings.PINECONE_API_KEY or not settings.PINECONE_ENVIRONMENT:
-        raise ValueError("Pinecone API key and environment must be set")
-    
-    pinecone.init(
-        api_key=settings.PINECONE_API_KEY,
-        environment=settings.PINECONE_ENVIRONMENT
-    )
-    
-    # Check if index exists, if not create it
-    if settings.PINECONE_INDEX_NAME not in pinecone.list_indexes():
-        pinecone.create_index(
-            name=settings.PINECONE_INDEX_NAME,
-            dimension=1536,  # OpenAI embeddings dimension
-            metric="cosine"
-        )
-    
-    return pinecone.Index(settings.PINECONE_INDEX_NAME)
+# Identical concurrent lookups share one embedding call / one vector search
+embedding_flight = SingleFlight("embedding")
+faq_search_flight = SingleFlight("faq_search")
+faq_load_flight = SingleFlight("faq_exact_load")
 
-# Get embeddings for text
-async def get_embeddings(text: str) -> List[float]:
+async def get_vector_store() -> VectorStore:
+    """Return the shared vector store, connecting it off the event loop if needed."""
+    store = vector_store_client.current()
+    if store is None:
+        store = await asyncio.to_thread(vector_store_client.get)
+    return store
+
+async def startup_vector_store() -> None:
+    """
+    Connect the vector store when the application starts.
+    """
+    try:
+        await get_vector_store()
+    except Exception as e:
+        # For development, keep serving and retry lazily on the first request
+        print(f"Failed to initialize vector store: {e}")
+
+async def shutdown_vector_store() -> None:
+    """
+    Release the vector store when the application stops.
     """
-    Get embeddings for text using OpenAI's embedding model.
+    await embedding_batcher.stop()
+    vector_store_client.close()
+    await embedding_cache.close()
+    faq_exact_index.clear()
+
+def faq_namespace(owner_id: Optional[int] = None, product_id: Optional[int] = None) -> str:
+    """
+    Vector store namespace holding the FAQs of one store, or of one of its products.
+    FAQs without an owner live in the shared default namespace.
+    """
+    if owner_id is None:
+        return ""
+    if product_id is None:
+        return f"store_{owner_id}"
+    return f"store_{owner_id}_product_{product_id}"
+
+def faq_namespaces(owner_id: Optional[int] = None, product_id: Optional[int] = None) -> List[str]:
+    """
+    Namespaces searched for a store or product, in order: its own FAQs, then
+    the shared FAQs imported without an owner.
+    """
+    namespace = faq_namespace(owner_id, product_id)
+    return [namespace, ""] if namespace else [namespace]
+
+def faq_id(question: str) -> str:
+    """
+    Build a stable FAQ id from the normalized question.
+    Unlike hash(), this is the same in every process, so re-imports overwrite.
+    """
+    return "faq_" + hashlib.sha256(normalize_text(question).encode("utf-8")).hexdigest()[:32]
+
+async def compute_embeddings_batch(texts: List[str]) -> List[List[float]]:
+    """
+    Compute embeddings for several texts in one call using OpenAI's embedding model.
     This is a placeholder - in a real implementation, you would use the OpenAI API.
     """
     # Placeholder for embeddings
-    return [0.0] * 1536  # Return a vector of zeros with dimension 1536
+    return [[0.0] * settings.EMBEDDING_DIMENSION for _ in texts]  # Vectors of zeros
+
+# Cache misses from concurrent callers are embedded together
+embedding_batcher = EmbeddingBatcher(
+    lambda texts: compute_embeddings_batch(texts),
+    max_batch=settings.EMBEDDING_BATCH_SIZE,
+    max_wait=settings.EMBEDDING_BATCH_WAIT_MS / 1000,
+    max_concurrency=settings.EMBEDDING_BATCH_CONCURRENCY,
+)
+
+# Get embeddings for text
+async def get_embeddings(text: str) -> List[float]:
+    """
+    Get embeddings for text, serving repeated questions from the embedding cache.
+    """
+    embeddings = await embedding_flight.do(embedding_cache.key(text), lambda: get_embeddings_batch([text]))
+    return embeddings[0]
+
+async def get_embeddings_batch(texts: List[str]) -> List[List[float]]:
+    """
+    Get embeddings for several texts, computing only the cache misses.
+    Misses are batched with other callers' before being computed.
+    """
+    embeddings = await embedding_cache.get_many(texts)
+    missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+    if missing:
+        computed = await embedding_batcher.embed([texts[i] for i in missing])
+        embedding_cache.put_many([texts[i] for i in missing], computed)
+        for i, embedding in zip(missing, computed):
+            embeddings[i] = embedding
+    return embeddings
+
+async def _load_exact_namespace(namespace: str) -> None:
+    """Read a namespace from whatever the store can list and index it, off the event loop."""
+    faq_exact_index.begin_load(namespace)
+    built = None
+    try:
+        store = await get_vector_store()
+        built = await asyncio.to_thread(lambda: faq_exact_index.build(store.iter_items(namespace)))
+    finally:
+        faq_exact_index.finish_load(built, namespace)
+
+async def find_exact_faq(query: str, owner_id: Optional[int] = None, product_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """
+    Look up a FAQ whose normalized question matches the query exactly.
+    This is a hash lookup, so it is cheap enough to try before vector search.
+    """
+    for namespace in faq_namespaces(owner_id, product_id):
+        if not faq_exact_index.is_loaded(namespace):
+            try:
+                await faq_load_flight.do(namespace, lambda: _load_exact_namespace(namespace))
+            except Exception as e:
+                print(f"Error loading exact-match FAQ index: {e}")
+        
+        entry = faq_exact_index.lookup(query, namespace)
+        if entry is not None:
+            return {"question": entry["question"], "answer": entry["answer"], "score": 1.0}
+    return None
 
 # Search vector database
-async def search_vector_database(query: str, threshold: float = 0.75, top_k: int = 5) -> List[Dict[str, Any]]:
+async def search_vector_database(
+    query: str,
+    threshold: float = 0.75,
+    top_k: int = 5,
+    owner_id: Optional[int] = None,
+    product_id: Optional[int] = None,
+) -> List[Dict[str, Any]]:
     """
     Search the vector database for similar questions.
+    The FAQs of the given store (or product) are searched first, then the
+    shared FAQs if none of its own match. Concurrent searches for the same
+    normalized question share one lookup.
     """
+    namespace = faq_namespace(owner_id, product_id)
+    key = (namespace, normalize_text(query), threshold, top_k)
+    return await faq_search_flight.do(key, lambda: _search_vector_database(query, threshold, top_k, namespace))
+
+async def _search_vector_database(query: str, threshold: float, top_k: int, namespace: str) -> List[Dict[str, Any]]:
     try:
         # Get embeddings for the query
         query_embedding = await get_embeddings(query)
         
-        # Initialize Pinecone
-        index = init_pinecone()
-        
-        # Search Pinecone
-        results = index.query(
-            vector=query_embedding,
-            top_k=top_k,
-            include_metadata=True
-        )
+        # Search the store's partition of the shared vector store off the event loop,
+        # since a local index can be locked for seconds while a bulk import retrains it
+        store = await get_vector_store()
+        matches = await asyncio.to_thread(store.query, query_embedding, top_k=top_k, namespace=namespace)
+        if namespace and not any(match["score"] >= threshold for match in matches):
+            matches = await asyncio.to_thread(store.query, query_embedding, top_k=top_k, namespace="")
         
         # Format results
         formatted_results = []
-        for match in results.matches:
-            if match.score >= threshold:
+        for match in matches:
+            if match["score"] >= threshold:
                 formatted_results.append({
-                    "question": match.metadata.get("question", ""),
-                    "answer": match.metadata.get("answer", ""),
-                    "score": match.score
+                    "question": match["metadata"].get("question", ""),
+                    "answer": match["metadata"].get("answer", ""),
+                    "score": match["score"]
                 })
         
         return formatted_results
@@ -79,33 +189,89 @@ async def search_vector_database(query: str, threshold: float = 0.75, top_k: int
             }
         ]
 
+# Store FAQs in vector database
+async def store_faqs(
+    faqs: List[Dict[str, str]],
+    owner_id: Optional[int] = None,
+    product_id: Optional[int] = None,
+) -> int:
+    """
+    Store a batch of FAQs with one embedding call and one upsert.
+    Each FAQ is a dict with question and answer. Returns the number stored.
+    """
+    namespace = faq_namespace(owner_id, product_id)
+    
+    # Later duplicates of the same question win, as they would with sequential upserts
+    unique = {faq_id(faq["question"]): faq for faq in faqs}
+    if not unique:
+        return 0
+    
+    # Get embeddings for the questions
+    questions = [faq["question"] for faq in unique.values()]
+    embeddings = await get_embeddings_batch(questions)
+    
+    items = [
+        {
+            "id": id_,
+            "values": embedding,
+            "metadata": {
+                "question": faq["question"],
+                "answer": faq["answer"]
+            }
+        }
+        for (id_, faq), embedding in zip(unique.items(), embeddings)
+    ]
+    
+    # Store in the shared vector store off the event loop
+    store = await get_vector_store()
+    await asyncio.to_thread(store.upsert, items, namespace)
+    
+    # Keep the exact-match fast path in sync
+    for item in items:
+        faq_exact_index.add(item["id"], item["metadata"]["question"], item["metadata"]["answer"], namespace)
+    
+    # Cached generated responses may now be answered by a FAQ instead
+    response_cache.invalidate(owner_id)
+    
+    return len(items)
+
 # Store FAQ in vector database
-async def store_faq(question: str, answer: str) -> bool:
+async def store_faq(
+    question: str,
+    answer: str,
+    owner_id: Optional[int] = None,
+    product_id: Optional[int] = None,
+) -> bool:
     """
     Store a FAQ in the vector database.
     """
     try:
-        # Get embeddings for the question
-        question_embedding = await get_embeddings(question)
-        
-        # Initialize Pinecone
-        index = init_pinecone()
+        await store_faqs([{"question": question, "answer": answer}], owner_id, product_id)
+        return True
+    except Exception as e:
+        print(f"Error storing FAQ in vector database: {e}")
+        return False
+
+# Delete FAQs from vector database
+async def delete_faqs(
+    questions: List[str],
+    owner_id: Optional[int] = None,
+    product_id: Optional[int] = None,
+) -> bool:
+    """
+    Delete FAQs from the vector database by question.
+    """
+    try:
+        namespace = faq_namespace(owner_id, product_id)
+        ids = [faq_id(question) for question in questions]
+        store = await get_vector_store()
+        await asyncio.to_thread(store.delete, ids, namespace)
         
-        # Store in Pinecone
-        index.upsert(
-            vectors=[
-                {
-                    "id": f"faq_{hash(question)}",
-                    "values": question_embedding,
-                    "metadata": {
-                        "question": question,
-                        "answer": answer
-                    }
-                }
-            ]
-        )
+        for id_ in ids:
+            faq_exact_index.remove(id_, namespace)
+        response_cache.invalidate(owner_id)
         
         return True
     except Exception as e:
-        print(f"Error storing FAQ in vector database: {e}")
+        print(f"Error deleting FAQs from vector database: {e}")
         return False
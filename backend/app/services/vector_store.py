@@ -0,0 +1,164 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import pinecone
+
+from app.core.config import settings
+
+
+class VectorStore:
+    """
+    Interface for the FAQ vector stores used by vector_service.
+
+    Matches are returned as plain dicts with ``id``, ``score`` and ``metadata``
+    so callers do not depend on a particular client library. Entries live in
+    namespaces; operations on one namespace never touch another, and ""
+    is the shared default namespace.
+    """
+
+    def connect(self) -> None:
+        """Open connections and resolve the index handle."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release any resources held by the store."""
+        pass
+
+    def query(self, vector: List[float], top_k: int, namespace: str = "") -> List[Dict[str, Any]]:
+        """Return the top_k closest entries to vector, best first."""
+        raise NotImplementedError
+
+    def upsert(self, items: List[Dict[str, Any]], namespace: str = "") -> None:
+        """Insert or replace entries given as dicts with id, values and metadata."""
+        raise NotImplementedError
+
+    def delete(self, ids: List[str], namespace: str = "") -> None:
+        """Remove entries by id."""
+        raise NotImplementedError
+
+    def iter_items(self, namespace: str = "") -> Iterator[Dict[str, Any]]:
+        """
+        Yield stored entries as dicts with id and metadata.
+        Stores that cannot list their contents cheaply yield nothing.
+        """
+        return iter(())
+
+
+class PineconeVectorStore(VectorStore):
+    def __init__(self):
+        self.index = None
+
+    def connect(self) -> None:
+        """Initialize Pinecone and cache the index handle."""
+        if self.index is not None:
+            return
+
+        if not settings.PINECONE_API_KEY or not settings.PINECONE_ENVIRONMENT:
+            raise ValueError("Pinecone API key and environment must be set")
+
+        pinecone.init(
+            api_key=settings.PINECONE_API_KEY,
+            environment=settings.PINECONE_ENVIRONMENT
+        )
+
+        # Check if index exists, if not create it
+        if settings.PINECONE_INDEX_NAME not in pinecone.list_indexes():
+            pinecone.create_index(
+                name=settings.PINECONE_INDEX_NAME,
+                dimension=settings.EMBEDDING_DIMENSION,
+                metric="cosine"
+            )
+
+        self.index = pinecone.Index(settings.PINECONE_INDEX_NAME)
+
+    def close(self) -> None:
+        self.index = None
+
+    def query(self, vector: List[float], top_k: int, namespace: str = "") -> List[Dict[str, Any]]:
+        results = self.index.query(
+            vector=vector,
+            top_k=top_k,
+            namespace=namespace,
+            include_metadata=True
+        )
+        return [
+            {"id": match.id, "score": match.score, "metadata": match.metadata or {}}
+            for match in results.matches
+        ]
+
+    def upsert(self, items: List[Dict[str, Any]], namespace: str = "") -> None:
+        self.index.upsert(vectors=items, namespace=namespace)
+
+    def delete(self, ids: List[str], namespace: str = "") -> None:
+        self.index.delete(ids=ids, namespace=namespace)
+
+
+def _local_vector_store() -> VectorStore:
+    # Imported lazily so Pinecone-only deployments do not load NumPy
+    from app.services.local_vector_store import LocalVectorStore
+    return LocalVectorStore()
+
+
+# Registered backends, keyed by the VECTOR_BACKEND setting
+_backends: Dict[str, Callable[[], VectorStore]] = {
+    "pinecone": PineconeVectorStore,
+    "local": _local_vector_store,
+}
+
+def register_vector_backend(name: str, factory: Callable[[], VectorStore]) -> None:
+    """Register a vector store backend so it can be selected with VECTOR_BACKEND."""
+    _backends[name] = factory
+
+def create_vector_store(name: str) -> VectorStore:
+    """Build an unconnected vector store for a registered backend name."""
+    if name not in _backends:
+        raise ValueError(f"Unknown vector backend: {name}")
+    return _backends[name]()
+
+
+class VectorStoreClient:
+    """
+    Process-wide holder for the configured vector store.
+
+    The backend is created and connected once, on first use or at startup,
+    and the same handle is reused by every request afterwards. After a
+    failed connect, get() fails fast until VECTOR_RETRY_INTERVAL has passed.
+    """
+
+    def __init__(self, backend: Optional[str] = None):
+        self.backend = backend
+        self._store: Optional[VectorStore] = None
+        self._lock = threading.Lock()
+        self._retry_at = 0.0
+
+    def current(self) -> Optional[VectorStore]:
+        """Return the connected store, or None if get() still has to connect it."""
+        return self._store
+
+    def get(self) -> VectorStore:
+        """Return the connected store, connecting it on first use. Blocks while connecting."""
+        if self._store is None:
+            with self._lock:
+                if self._store is None:
+                    if time.monotonic() < self._retry_at:
+                        raise ConnectionError("Vector store unavailable; waiting to reconnect")
+                    try:
+                        store = create_vector_store(self.backend or settings.VECTOR_BACKEND)
+                        store.connect()
+                    except Exception:
+                        self._retry_at = time.monotonic() + settings.VECTOR_RETRY_INTERVAL
+                        raise
+                    self._store = store
+        return self._store
+
+    def close(self) -> None:
+        """Close the store; the next get() reconnects."""
+        with self._lock:
+            if self._store is not None:
+                self._store.close()
+                self._store = None
+
+
+# Initialize vector store client
+vector_store_client = VectorStoreClient()
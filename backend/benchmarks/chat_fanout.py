@@ -0,0 +1,151 @@
+"""
+Measure server-initiated chat message fan-out through the pub/sub broker.
+
+Starts N worker processes, each holding chat sockets for its own share of
+users, then publishes messages to random users from a separate process and
+reports end-to-end delivered messages per second:
+
+    python -m benchmarks.chat_fanout --backend redis --workers 4 --messages 100000
+
+The memory backend only reaches sockets in its own process, so it runs one
+in-process worker. Sockets are stand-ins that count what would be sent.
+"""
+import time
+import random
+import asyncio
+import argparse
+import multiprocessing
+from typing import Dict, List, Tuple
+
+from app.services.connection_manager import ConnectionManager
+from app.services.pubsub import create_broker
+
+
+class CountingSocket:
+    """Stand-in WebSocket that records how many messages it was sent and when the last arrived."""
+
+    def __init__(self, counter: Dict[str, float]):
+        self.counter = counter
+
+    async def accept(self) -> None:
+        pass
+
+    async def close(self, code: int = 1000) -> None:
+        pass
+
+    async def send_text(self, text: str) -> None:
+        self.counter["received"] += 1
+        self.counter["last"] = time.time()
+
+
+async def open_sockets(manager: ConnectionManager, user_ids: range, counter: Dict[str, float]) -> List[asyncio.Task]:
+    senders = []
+    for user_id in user_ids:
+        connection = await manager.connect(CountingSocket(counter), user_id)
+        senders.append(asyncio.create_task(manager._send_loop(connection)))
+    return senders
+
+
+async def publish(manager: ConnectionManager, targets: List[int], concurrency: int) -> float:
+    """Publish one message per target user; returns the wall-clock start time."""
+    started = time.time()
+    chunks = [targets[i::concurrency] for i in range(concurrency)]
+
+    async def run(chunk: List[int]) -> None:
+        for user_id in chunk:
+            await manager.publish(user_id, "order delivered")
+
+    await asyncio.gather(*(run(chunk) for chunk in chunks))
+    return started
+
+
+async def worker_async(backend: str, user_ids: range, expected: int, ready, results, timeout: float) -> None:
+    manager = ConnectionManager(max_connections=len(user_ids), queue_size=1024, broker=create_broker(backend))
+    await manager.start()
+    counter = {"received": 0, "last": 0.0}
+    senders = await open_sockets(manager, user_ids, counter)
+    ready.set()
+    deadline = time.time() + timeout
+    while counter["received"] < expected and time.time() < deadline:
+        await asyncio.sleep(0.01)
+    results.put((counter["received"], counter["last"]))
+    for sender in senders:
+        sender.cancel()
+    await manager.stop()
+
+
+def worker(backend: str, user_ids: range, expected: int, ready, results, timeout: float) -> None:
+    asyncio.run(worker_async(backend, user_ids, expected, ready, results, timeout))
+
+
+async def publisher_async(backend: str, targets: List[int], concurrency: int) -> float:
+    manager = ConnectionManager(broker=create_broker(backend))
+    await manager.start()
+    try:
+        return await publish(manager, targets, concurrency)
+    finally:
+        await manager.stop()
+
+
+async def in_process(targets: List[int], users: int, concurrency: int) -> Tuple[float, int, float]:
+    manager = ConnectionManager(max_connections=users, queue_size=1024, broker=create_broker("memory"))
+    await manager.start()
+    counter = {"received": 0, "last": 0.0}
+    senders = await open_sockets(manager, range(users), counter)
+    started = await publish(manager, targets, concurrency)
+    while counter["received"] < len(targets):
+        await asyncio.sleep(0)
+    for sender in senders:
+        sender.cancel()
+    await manager.stop()
+    return started, counter["received"], counter["last"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--backend", default="redis", choices=["memory", "redis"])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--users", type=int, default=250, help="Connected users per worker")
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent publishes")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    workers = 1 if args.backend == "memory" else args.workers
+    total_users = workers * args.users
+    rng = random.Random(0)
+    targets = [rng.randrange(total_users) for _ in range(args.messages)]
+
+    if args.backend == "memory":
+        started, received, last = asyncio.run(in_process(targets, total_users, args.concurrency))
+        counts = [received]
+    else:
+        ready = [multiprocessing.Event() for _ in range(workers)]
+        results = multiprocessing.Queue()
+        processes = []
+        for i in range(workers):
+            user_ids = range(i * args.users, (i + 1) * args.users)
+            expected = sum(1 for user_id in targets if user_id in user_ids)
+            process = multiprocessing.Process(
+                target=worker, args=(args.backend, user_ids, expected, ready[i], results, args.timeout)
+            )
+            process.start()
+            processes.append(process)
+        for event in ready:
+            event.wait(args.timeout)
+        started = asyncio.run(publisher_async(args.backend, targets, args.concurrency))
+        reports = [results.get(timeout=args.timeout + 10) for _ in processes]
+        for process in processes:
+            process.join()
+        counts = [count for count, _ in reports]
+        last = max(last for _, last in reports)
+
+    delivered = sum(counts)
+    elapsed = max(last - started, 1e-9)
+    print(f"{args.backend}: {workers} workers x {args.users} users, {args.messages} messages")
+    print(f"delivered {delivered}/{args.messages} in {elapsed:.2f}s = {delivered / elapsed:.0f} msg/s")
+    print("per worker: " + ", ".join(str(count) for count in counts))
+
+
+if __name__ == "__main__":
+    main()
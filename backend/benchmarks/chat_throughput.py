@@ -0,0 +1,109 @@
+"""
+Measure chat generation throughput against an OpenAI-compatible endpoint.
+
+Start the stub server, then stream completions for many concurrent chats
+through the LLM client, with one pooled client or a new client per chat:
+
+    python llm_stub_server.py --latency 0.3 --token-delay 0.01 &
+    python -m benchmarks.chat_throughput --chats 2000 --concurrency 200
+
+Reports completed chats per second, time to first token and total latency.
+"""
+import time
+import asyncio
+import argparse
+from typing import Dict, List
+
+import numpy as np
+
+from app.services.llm_client import LLMClient
+
+
+def make_client(args: argparse.Namespace) -> LLMClient:
+    return LLMClient(
+        base_url=args.base_url,
+        max_concurrency=args.max_in_flight,
+        timeout=args.timeout,
+        max_retries=args.retries,
+    )
+
+
+async def chat(client: LLMClient, message: str, prompt: str, first: List[float], total: List[float]) -> None:
+    started = time.perf_counter()
+    seen_first = False
+    async for _ in client.stream(message, prompt):
+        if not seen_first:
+            first.append(time.perf_counter() - started)
+            seen_first = True
+    total.append(time.perf_counter() - started)
+
+
+async def run(args: argparse.Namespace, pooled: bool) -> Dict[str, float]:
+    shared = make_client(args) if pooled else None
+    slots = asyncio.Semaphore(args.concurrency)
+    first: List[float] = []
+    total: List[float] = []
+    failures = 0
+    retries = 0
+
+    async def one(i: int) -> None:
+        nonlocal failures, retries
+        async with slots:
+            client = shared or make_client(args)
+            try:
+                await chat(client, f"question {i} about my order", f"Store {i % args.stores} prompt", first, total)
+            except Exception:
+                failures += 1
+            finally:
+                if shared is None:
+                    retries += client.retries
+                    await client.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(args.chats)))
+    elapsed = time.perf_counter() - started
+    if shared:
+        retries = shared.retries
+        await shared.close()
+
+    first_ms = np.array(first or [0.0]) * 1000
+    total_ms = np.array(total or [0.0]) * 1000
+    return {
+        "chats_per_second": len(total) / elapsed,
+        "failures": failures,
+        "retries": retries,
+        "first_p50_ms": float(np.percentile(first_ms, 50)),
+        "first_p99_ms": float(np.percentile(first_ms, 99)),
+        "total_p50_ms": float(np.percentile(total_ms, 50)),
+        "total_p99_ms": float(np.percentile(total_ms, 99)),
+    }
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    print(f"{args.chats} chats, {args.concurrency} concurrent, at most {args.max_in_flight} in flight, {args.base_url}")
+    print(f"{'client':<10}{'chats/s':>10}{'fail':>6}{'retry':>7}{'ttft p50':>10}{'ttft p99':>10}{'total p50':>11}{'total p99':>11}")
+    modes = ["pooled"] if args.pooled_only else ["pooled", "per-chat"]
+    for mode in modes:
+        result = await run(args, pooled=mode == "pooled")
+        print(
+            f"{mode:<10}{result['chats_per_second']:>10.1f}{result['failures']:>6}{result['retries']:>7}"
+            f"{result['first_p50_ms']:>10.1f}{result['first_p99_ms']:>10.1f}"
+            f"{result['total_p50_ms']:>11.1f}{result['total_p99_ms']:>11.1f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--base-url", default="http://127.0.0.1:8100/v1")
+    parser.add_argument("--chats", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=100, help="Chats in progress at once")
+    parser.add_argument("--max-in-flight", type=int, default=64, help="The client's cap on requests in flight")
+    parser.add_argument("--stores", type=int, default=20, help="Distinct custom prompts")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--retries", type=int, default=2)
+    parser.add_argument("--pooled-only", action="store_true")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
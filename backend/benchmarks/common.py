@@ -0,0 +1,52 @@
+import time
+from typing import Callable, List, Sequence, Tuple
+
+import numpy as np
+
+
+def make_dataset(size: int, dimension: int, queries: int, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Build clustered unit vectors plus noisy queries drawn from them.
+
+    Real FAQ embeddings cluster by topic, which uniform random vectors do not,
+    so the data is sampled around a few hundred centres.
+    """
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((max(1, min(size // 50, 512)), dimension)).astype(np.float32)
+    data = centres[rng.integers(0, len(centres), size)] + 0.5 * rng.standard_normal((size, dimension)).astype(np.float32)
+    data /= np.linalg.norm(data, axis=1, keepdims=True)
+    picks = rng.integers(0, size, queries)
+    query_vectors = data[picks] + 0.1 * rng.standard_normal((queries, dimension)).astype(np.float32)
+    query_vectors /= np.linalg.norm(query_vectors, axis=1, keepdims=True)
+    return data, query_vectors
+
+
+def exact_top_k(data: np.ndarray, queries: np.ndarray, k: int) -> List[set]:
+    """Ground-truth neighbour ids for every query."""
+    truth = []
+    for query in queries:
+        scores = data @ query
+        truth.append(set(np.argpartition(-scores, k - 1)[:k].tolist()))
+    return truth
+
+
+def recall_at_k(found: Sequence[Sequence[int]], truth: Sequence[set]) -> float:
+    hits = sum(len(set(ids) & expected) for ids, expected in zip(found, truth))
+    return hits / sum(len(expected) for expected in truth)
+
+
+def timed_queries(search: Callable[[np.ndarray], List[int]], queries: np.ndarray) -> Tuple[List[List[int]], float]:
+    """Run every query through search; returns the results and queries per second."""
+    started = time.perf_counter()
+    found = [search(query) for query in queries]
+    elapsed = time.perf_counter() - started
+    return found, len(queries) / elapsed if elapsed > 0 else float("inf")
+
+
+def fill_index(index, data: np.ndarray, chunk: int = 1000) -> None:
+    """Upsert data into an index using row numbers as ids."""
+    for start in range(0, len(data), chunk):
+        index.upsert([
+            {"id": str(row), "values": data[row], "metadata": {}}
+            for row in range(start, min(start + chunk, len(data)))
+        ])
@@ -0,0 +1,84 @@
+"""
+Measure embedding throughput and latency with and without micro-batching.
+
+Concurrent callers embed one text each through the batcher, backed by a
+simulated embedding call costing a fixed overhead plus a per-text cost:
+
+    python -m benchmarks.embedding_batching --callers 200 --requests 20000 --overhead-ms 20 --per-item-ms 0.2
+
+Each configuration is max_batch/max_wait_ms; 1/0 is the unbatched baseline.
+"""
+import time
+import asyncio
+import argparse
+from typing import Dict, List
+
+import numpy as np
+
+from app.services.embedding_batcher import EmbeddingBatcher
+
+
+def simulated_backend(overhead: float, per_item: float, dimension: int):
+    async def embed_batch(texts: List[str]) -> List[List[float]]:
+        await asyncio.sleep(overhead + per_item * len(texts))
+        return [[0.0] * dimension for _ in texts]
+    return embed_batch
+
+
+async def run(args: argparse.Namespace, max_batch: int, max_wait_ms: float) -> Dict[str, float]:
+    batcher = EmbeddingBatcher(
+        simulated_backend(args.overhead_ms / 1000, args.per_item_ms / 1000, args.dimension),
+        max_batch=max_batch,
+        max_wait=max_wait_ms / 1000,
+        max_concurrency=args.concurrency,
+    )
+    latencies: List[float] = []
+    per_caller = args.requests // args.callers
+
+    async def caller(index: int) -> None:
+        for i in range(per_caller):
+            started = time.perf_counter()
+            await batcher.embed([f"message {index}-{i}"])
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(caller(i) for i in range(args.callers)))
+    elapsed = time.perf_counter() - started
+    await batcher.stop()
+
+    latency_ms = np.array(latencies) * 1000
+    return {
+        "per_second": len(latencies) / elapsed,
+        "p50_ms": float(np.percentile(latency_ms, 50)),
+        "p99_ms": float(np.percentile(latency_ms, 99)),
+        "avg_batch": batcher.batch_sizes.stats()["avg"],
+        "batches": batcher.batches,
+    }
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    print(f"{args.callers} callers, {args.requests} texts, {args.overhead_ms}ms + {args.per_item_ms}ms/text per call, {args.concurrency} calls in flight")
+    print(f"{'batch/wait':<12}{'texts/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'avg batch':>11}{'calls':>8}")
+    for config in args.configs:
+        max_batch, max_wait_ms = config.split("/")
+        result = await run(args, int(max_batch), float(max_wait_ms))
+        print(
+            f"{config:<12}{result['per_second']:>10.0f}{result['p50_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+            f"{result['avg_batch']:>11.1f}{result['batches']:>8}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--callers", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--overhead-ms", type=float, default=20.0, help="Fixed cost of one embedding call")
+    parser.add_argument("--per-item-ms", type=float, default=0.2, help="Added cost per text in a call")
+    parser.add_argument("--concurrency", type=int, default=4, help="Embedding calls in flight")
+    parser.add_argument("--dimension", type=int, default=1536)
+    parser.add_argument("--configs", nargs="+", default=["1/0", "16/2", "64/5", "256/10"])
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Compare write throughput and read latency of the conversation memory backends.
+
+Writes the same memory events to every backend in batches the size the
+write-behind queue uses, then reads each user's recent memories:
+
+    python -m benchmarks.memory_backends --backends sqlite neo4j --events 100000
+
+The neo4j backend uses the NEO4J_* settings and writes into that database;
+point it at a scratch instance. Backends that cannot connect are skipped.
+"""
+import json
+import time
+import uuid
+import random
+import asyncio
+import argparse
+import tempfile
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+import numpy as np
+
+from app.services.memory_store import MemoryBackend, create_memory_backend
+from app.services.sqlite_memory_store import SQLiteMemoryBackend
+
+
+def make_events(count: int, users: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Chat-sized memory events spread over users, oldest first."""
+    rng = random.Random(seed)
+    start = datetime.now(timezone.utc) - timedelta(seconds=count)
+    return [
+        {
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "user_id": rng.randrange(users),
+            "type": rng.choice(["faq_response", "ai_response"]),
+            "data": json.dumps({"query": "x" * 40, "response": "y" * 200}),
+            "timestamp": (start + timedelta(seconds=i)).isoformat(timespec="microseconds"),
+        }
+        for i in range(count)
+    ]
+
+
+async def run(store: MemoryBackend, events: List[Dict[str, Any]], batch_size: int, users: int, reads: int, limit: int) -> Dict[str, float]:
+    started = time.perf_counter()
+    for offset in range(0, len(events), batch_size):
+        await store.write(events[offset:offset + batch_size])
+    write_seconds = time.perf_counter() - started
+
+    latencies = []
+    for user_id in random.Random(1).choices(range(users), k=reads):
+        started = time.perf_counter()
+        await store.recent(user_id, limit)
+        latencies.append(time.perf_counter() - started)
+    latencies = np.array(latencies) * 1000
+    return {
+        "writes_per_second": len(events) / write_seconds,
+        "read_p50_ms": float(np.percentile(latencies, 50)),
+        "read_p95_ms": float(np.percentile(latencies, 95)),
+    }
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    events = make_events(args.events, args.users)
+    print(f"{args.events} events over {args.users} users, batches of {args.batch_size}, recent({args.limit})")
+    print(f"{'backend':<10}{'writes/s':>12}{'read p50 ms':>14}{'read p95 ms':>14}")
+    with tempfile.TemporaryDirectory() as path:
+        for name in args.backends:
+            if name == "sqlite":
+                store = SQLiteMemoryBackend(f"{path}/memories.db")
+            else:
+                store = create_memory_backend(name)
+            await store.connect()
+            if not store.available:
+                print(f"{name:<10}skipped: not connected")
+                await store.close()
+                continue
+            try:
+                result = await run(store, events, args.batch_size, args.users, args.reads, args.limit)
+            except Exception as e:
+                print(f"{name:<10}skipped: {e}")
+                continue
+            finally:
+                await store.close()
+            print(f"{name:<10}{result['writes_per_second']:>12.0f}{result['read_p50_ms']:>14.3f}{result['read_p95_ms']:>14.3f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--backends", nargs="+", default=["sqlite"])
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--reads", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=10)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Compare IVF approximate search of the local vector store against exact search.
+
+Builds one index per size, then reports per-query latency and recall@k for
+exact search and for IVF at several nprobe values:
+
+    python -m benchmarks.vector_ann --sizes 10000 100000 1000000 --dim 128
+"""
+import time
+import argparse
+import tempfile
+
+import numpy as np
+
+from app.services.local_vector_store import LocalFaqIndex
+from benchmarks.common import exact_top_k, fill_index, make_dataset, recall_at_k, timed_queries
+
+
+def suggested_nlist(size: int) -> int:
+    """Roughly sqrt(n) lists, the usual starting point for IVF."""
+    return max(16, int(np.sqrt(size)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, default=None, help="Defaults to about sqrt(size)")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        nlist = args.nlist or suggested_nlist(size)
+        data, queries = make_dataset(size, args.dim, args.queries)
+        truth = exact_top_k(data, queries, args.k)
+
+        with tempfile.TemporaryDirectory() as path:
+            index = LocalFaqIndex(path, args.dim)
+            index.open()
+            fill_index(index, data)
+            found, qps = timed_queries(lambda q: [int(m["id"]) for m in index.query(q, args.k)], queries)
+            index.close()
+
+            print(f"\n{size} vectors x {args.dim} dims, nlist={nlist}, recall@{args.k}")
+            print(f"{'search':<14}{'ms/query':>10}{'recall':>10}")
+            print(f"{'exact':<14}{1000 / qps:>10.3f}{recall_at_k(found, truth):>10.3f}")
+
+            # Reopening with ANN enabled trains and assigns once; later opens reuse the saved lists
+            started = time.perf_counter()
+            index = LocalFaqIndex(path, args.dim, ann="ivf", nlist=nlist)
+            index.open()
+            print(f"(IVF build {time.perf_counter() - started:.1f}s)")
+            for nprobe in args.nprobe:
+                found, qps = timed_queries(
+                    lambda q: [int(m["id"]) for m in index.query(q, args.k, nprobe=nprobe)],
+                    queries,
+                )
+                print(f"{f'ivf nprobe={nprobe}':<14}{1000 / qps:>10.3f}{recall_at_k(found, truth):>10.3f}")
+            index.close()
+
+            started = time.perf_counter()
+            index = LocalFaqIndex(path, args.dim, ann="ivf", nlist=nlist)
+            index.open()
+            print(f"(IVF reopen {time.perf_counter() - started:.1f}s)")
+            index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Compare FAQ vector quantization modes of the local vector store.
+
+Reports resident scoring memory, queries per second and recall@k against
+exact float32 search, to pick LOCAL_VECTOR_QUANTIZATION per store:
+
+    python -m benchmarks.vector_quantization --size 100000 --dim 1536
+"""
+import argparse
+import tempfile
+
+from app.services.local_vector_store import LocalFaqIndex
+from benchmarks.common import exact_top_k, fill_index, make_dataset, recall_at_k, timed_queries
+
+MODES = [
+    ("float32", "none", 0),
+    ("float16", "float16", 0),
+    ("float16+rerank", "float16", 4),
+    ("int8", "int8", 0),
+    ("int8+rerank", "int8", 4),
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--rerank-factor", type=int, default=4)
+    args = parser.parse_args()
+
+    data, queries = make_dataset(args.size, args.dim, args.queries)
+    truth = exact_top_k(data, queries, args.k)
+
+    print(f"{args.size} vectors x {args.dim} dims, {args.queries} queries, recall@{args.k}")
+    print(f"{'mode':<16}{'memory MB':>12}{'QPS':>10}{'recall':>10}")
+    with tempfile.TemporaryDirectory() as path:
+        # Every mode reads the same float32 file; only the scoring copy differs
+        base = LocalFaqIndex(path, args.dim)
+        base.open()
+        fill_index(base, data)
+        base.close()
+
+        for label, mode, rerank in MODES:
+            index = LocalFaqIndex(path, args.dim, mode, args.rerank_factor if rerank else 0)
+            index.open()
+            found, qps = timed_queries(
+                lambda q: [int(match["id"]) for match in index.query(q, args.k)],
+                queries,
+            )
+            print(f"{label:<16}{index.memory_bytes() / 2**20:>12.1f}{qps:>10.0f}{recall_at_k(found, truth):>10.3f}")
+            index.close()
+
+
+if __name__ == "__main__":
+    main()
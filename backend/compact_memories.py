@@ -0,0 +1,36 @@
+import asyncio
+import argparse
+import logging
+
+from app.services.memory_store import memory_store_client
+from app.services.memory_compaction import memory_compactor
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+async def run(max_batches: int) -> dict:
+    try:
+        return await memory_compactor.run_once(max_batches=max_batches)
+    finally:
+        await memory_store_client.close()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Roll up and prune chat memories past the retention window")
+    parser.add_argument("--retention-days", type=float, default=None)
+    parser.add_argument("--batch-size", type=int, default=None, help="Memories per transaction")
+    parser.add_argument("--max-batches", type=int, default=None, help="Stop after this many batches")
+    args = parser.parse_args()
+    if args.retention_days is not None:
+        memory_compactor.retention_days = args.retention_days
+    if args.batch_size is not None:
+        memory_compactor.batch_size = args.batch_size
+
+    logger.info("Compacting memories older than %s days", memory_compactor.retention_days)
+    report = asyncio.run(run(args.max_batches))
+    logger.info(
+        "Reclaimed %d memory nodes and %d bytes in %d batches (%.1fs)",
+        report["nodes"], report["bytes"], report["batches"], report["seconds"]
+    )
+
+if __name__ == "__main__":
+    main()
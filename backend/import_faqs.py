@@ -0,0 +1,64 @@
+import asyncio
+import argparse
+import logging
+
+from app.core.config import settings
+from app.services.faq_ingest import detect_format, ingest_faq_file
+from app.services.vector_service import startup_vector_store, shutdown_vector_store
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def bounded_int(maximum: int):
+    """argparse type for an integer from 1 to maximum, the bounds the import endpoint enforces."""
+    def parse(value: str) -> int:
+        try:
+            number = int(value)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"invalid int value: {value!r}")
+        if not 1 <= number <= maximum:
+            raise argparse.ArgumentTypeError(f"must be between 1 and {maximum}")
+        return number
+    return parse
+
+def log_progress(report: dict) -> None:
+    logger.info(
+        "Batch %d: %d stored, %d skipped, %d failed (%.1f/s)",
+        report["batches"], report["stored"], report["skipped"], report["failed"], report["per_second"]
+    )
+
+async def run(path: str, fmt: str, owner_id: int, product_id: int, batch_size: int, concurrency: int) -> dict:
+    await startup_vector_store()
+    try:
+        with open(path, "rb") as f:
+            return await ingest_faq_file(
+                f, fmt,
+                owner_id=owner_id,
+                product_id=product_id,
+                batch_size=batch_size,
+                concurrency=concurrency,
+                on_progress=log_progress,
+            )
+    finally:
+        await shutdown_vector_store()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk import FAQs into the vector database")
+    parser.add_argument("path", help="CSV (question,answer columns) or JSONL file")
+    parser.add_argument("--owner-id", type=int, default=None, help="Store owner; omit for the shared FAQ namespace")
+    parser.add_argument("--product-id", type=int, default=None, help="Import into one product's FAQs")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="Defaults to the file extension")
+    parser.add_argument("--batch-size", type=bounded_int(settings.FAQ_IMPORT_MAX_BATCH_SIZE), default=None)
+    parser.add_argument("--concurrency", type=bounded_int(settings.FAQ_IMPORT_MAX_CONCURRENCY), default=None)
+    args = parser.parse_args()
+
+    logger.info("Importing FAQs from %s", args.path)
+    if args.product_id is not None and args.owner_id is None:
+        parser.error("--product-id requires --owner-id")
+
+    fmt = args.format or detect_format(args.path)
+    report = asyncio.run(run(args.path, fmt, args.owner_id, args.product_id, args.batch_size, args.concurrency))
+    logger.info("Import finished: %s", report)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+import asyncio
+import argparse
+import logging
+
+from app.services.graph_service import neo4j_service
+from app.services.graph_schema import ensure_schema
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+async def run(explain: bool) -> dict:
+    await neo4j_service.connect()
+    if not neo4j_service.driver:
+        raise SystemExit("Cannot reach Neo4j at " + neo4j_service.uri)
+    try:
+        return await ensure_schema(explain=explain)
+    finally:
+        await neo4j_service.close()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Create Neo4j constraints and indexes for chat memories")
+    parser.add_argument("--explain", action="store_true", help="Also show query plans for the hot memory queries")
+    args = parser.parse_args()
+
+    logger.info("Creating graph schema")
+    report = asyncio.run(run(args.explain))
+    for name, state in report["states"].items():
+        logger.info("%s: %s", name, state)
+    for name, plan in report.get("plans", {}).items():
+        if plan is None:
+            continue
+        logger.info("%s plan: %s", name, " <- ".join(plan["operators"]))
+        if plan["scans"]:
+            logger.warning("%s scans by label: %s", name, ", ".join(plan["scans"]))
+    if report["problems"]:
+        raise SystemExit(f"Schema not ready: {', '.join(report['problems'])}")
+    logger.info("Graph schema ready")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+OpenAI-compatible chat completions server with canned replies, for offline load tests.
+
+    python llm_stub_server.py --port 8100 --latency 0.3 --token-delay 0.02
+    LLM_BASE_URL=http://localhost:8100/v1 uvicorn app.main:app
+
+Every completion waits latency seconds before its first token, then emits
+tokens words token-delay seconds apart. With --error-rate, that share of
+requests fails with 429 or 503 so client retries can be exercised.
+"""
+import json
+import time
+import random
+import asyncio
+import argparse
+import logging
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+app = FastAPI(title="LLM stub")
+
+# Replaced from the command line
+config = {"latency": 0.2, "token_delay": 0.01, "tokens": 40, "error_rate": 0.0}
+
+def canned_tokens(message: str) -> list:
+    words = f"Thanks for asking about {message[:80]}. Here is what you need to know.".split(" ")
+    filler = ["Please", "check", "the", "product", "page", "for", "more", "details."]
+    while len(words) < config["tokens"]:
+        words.extend(filler)
+    return [word if i == 0 else " " + word for i, word in enumerate(words[:config["tokens"]])]
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    if random.random() < config["error_rate"]:
+        status_code = random.choice([429, 503])
+        return JSONResponse({"error": {"message": "Stub failure"}}, status_code=status_code, headers={"Retry-After": "0"})
+
+    messages = body.get("messages") or [{"content": ""}]
+    tokens = canned_tokens(messages[-1].get("content", ""))
+    completion_id = f"chatcmpl-stub-{random.getrandbits(32):08x}"
+    created = int(time.time())
+    model = body.get("model", "stub")
+    await asyncio.sleep(config["latency"])
+
+    if not body.get("stream"):
+        await asyncio.sleep(config["token_delay"] * len(tokens))
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(tokens)}, "finish_reason": "stop"}],
+        }
+
+    async def events():
+        for token in tokens:
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+            await asyncio.sleep(config["token_delay"])
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency", type=float, default=config["latency"], help="Seconds before the first token")
+    parser.add_argument("--token-delay", type=float, default=config["token_delay"], help="Seconds between tokens")
+    parser.add_argument("--tokens", type=int, default=config["tokens"], help="Tokens per completion")
+    parser.add_argument("--error-rate", type=float, default=config["error_rate"], help="Share of requests answered with 429 or 503")
+    args = parser.parse_args()
+    config.update(latency=args.latency, token_delay=args.token_delay, tokens=args.tokens, error_rate=args.error_rate)
+
+    import uvicorn
+    logger.info("Serving canned completions on http://%s:%d/v1", args.host, args.port)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()